@@ -0,0 +1,113 @@
+"""Compare the ASGI and WSGI deployments under many slow concurrent clients
+
+Start both servers against the same database, for example:
+
+    uvicorn recipe_book.asgi:application --port 8001
+    gunicorn recipe_book.wsgi --threads 32 --bind 127.0.0.1:8002
+
+then run:
+
+    python benchmarks/asgi_vs_wsgi.py --token <token> \\
+        http://127.0.0.1:8001/api/recipe/recipes/ \\
+        http://127.0.0.1:8002/api/recipe/recipes/
+
+Each client opens its own connection and trickles its request headers like a
+slow mobile client before reading the response.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(latencies, fraction: float) -> float:
+    """Return a percentile of sorted latencies, in milliseconds"""
+    if not latencies:
+        return 0.0
+
+    position = min(len(latencies) - 1, int(len(latencies) * fraction))
+    return latencies[position] * 1000
+
+
+async def fetch(url: str, token: str, delay: float) -> float:
+    """Send one slow GET request and return its latency in seconds"""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    started = time.perf_counter()
+    try:
+        writer.write(f"GET {parts.path}?{parts.query} HTTP/1.1\r\n".encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+        writer.write(
+            (
+                f"Host: {parts.netloc}\r\n"
+                f"Authorization: Token {token}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        status = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+
+    if b" 200 " not in status:
+        raise RuntimeError(status.decode(errors="replace").strip())
+    return time.perf_counter() - started
+
+
+async def run(url: str, token: str, clients: int, requests: int, delay: float):
+    """Run concurrent clients against a url and return a summary of the run"""
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for _ in range(requests):
+            try:
+                latencies.append(await fetch(url, token, delay))
+            except (OSError, RuntimeError):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="+", help="urls of the endpoints to compare")
+    parser.add_argument("--token", required=True, help="API token of a user")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5, help="per client")
+    parser.add_argument(
+        "--delay", type=float, default=0.5, help="seconds spent sending headers"
+    )
+    args = parser.parse_args()
+
+    for url in args.urls:
+        result = asyncio.run(
+            run(url, args.token, args.clients, args.requests, args.delay)
+        )
+        print(
+            "{url}: {requests} requests, {errors} errors, {rps:.0f} req/s, "
+            "mean {mean_ms:.0f}ms, p50 {p50_ms:.0f}ms, p99 {p99_ms:.0f}ms".format(
+                **result
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare latency with and without persistent database connections
+
+Starts gunicorn once per connection mode against the database configured by
+the DB_* environment variables and loads an endpoint reading the database:
+
+    python benchmarks/db_connections.py --token <token> /api/recipe/recipes/1/
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.asgi_vs_wsgi import run  # noqa: E402
+
+MODES = {
+    "new connection per request": {"DB_CONN_MAX_AGE": "0"},
+    "persistent connections": {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "1"},
+}
+
+
+def wait_for_port(port: int, server: subprocess.Popen, timeout: float = 30) -> None:
+    """Wait until a port accepts connections, failing if the server exits"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with code {server.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"nothing listening on port {port} in {timeout}s")
+            time.sleep(0.1)
+
+
+def serve(port: int, threads: int, env: dict) -> subprocess.Popen:
+    """Start gunicorn on a port and wait until it accepts connections"""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "recipe_book.wsgi",
+            f"--threads={threads}",
+            f"--bind=127.0.0.1:{port}",
+            "--log-level=warning",
+        ],
+        cwd=ROOT,
+        env={**os.environ, **env},
+    )
+    try:
+        wait_for_port(port, server)
+    except RuntimeError:
+        server.terminate()
+        server.wait()
+        raise
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="path of an endpoint reading the database")
+    parser.add_argument("--token", required=True, help="API token of a user")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100, help="per client")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8010)
+    args = parser.parse_args()
+
+    for name, env in MODES.items():
+        server = serve(args.port, args.threads, env)
+        try:
+            result = asyncio.run(
+                run(
+                    f"http://127.0.0.1:{args.port}{args.path}",
+                    args.token,
+                    args.clients,
+                    args.requests,
+                    delay=0,
+                )
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(
+            f"{name}: {result['requests']} requests, {result['errors']} errors, "
+            f"{result['rps']:.0f} req/s, p50 {result['p50_ms']:.1f}ms, "
+            f"p99 {result['p99_ms']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
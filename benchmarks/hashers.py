@@ -0,0 +1,97 @@
+"""Benchmark the password hasher profiles with the costs of the settings
+
+    python benchmarks/hashers.py
+    PASSWORD_ARGON2_MEMORY_COST=65536 python benchmarks/hashers.py --profile argon2
+
+For each profile whose library is installed, the median time to hash and to
+verify a password is reported, along with the logins per second the hasher
+pool sustains with PASSWORD_HASHER_WORKERS threads.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recipe_book.settings")
+
+    import django
+
+    django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+
+from core.hashers import HasherPool  # noqa: E402
+
+
+PASSWORD = "correct horse battery staple"
+
+
+def measure(hasher, repeat: int, logins: int) -> dict:
+    """Return the median hash and verify times and the pool login throughput"""
+    hashes, verifies = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        hashed = time.perf_counter()
+        hasher.verify(PASSWORD, encoded)
+        verifies.append(time.perf_counter() - hashed)
+        hashes.append(hashed - started)
+
+    workers = settings.PASSWORD_HASHER_WORKERS
+    pool = HasherPool(workers, logins)
+    # clients wait on the pool from their own threads, like request threads do
+    with ThreadPoolExecutor(logins) as clients:
+        started = time.perf_counter()
+        list(
+            clients.map(
+                lambda _: pool.run(hasher.verify, PASSWORD, encoded), range(logins)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "hash_ms": round(statistics.median(hashes) * 1000, 1),
+        "verify_ms": round(statistics.median(verifies) * 1000, 1),
+        "workers": workers,
+        "logins_per_second": round(logins / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profile",
+        action="append",
+        dest="profiles",
+        choices=list(settings.PASSWORD_HASHER_PROFILES),
+        help="profile to benchmark, every installed profile by default",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--logins", type=int, default=50, help="concurrent logins")
+    args = parser.parse_args()
+
+    for profile in args.profiles or settings.PASSWORD_HASHER_PROFILES:
+        hasher = import_string(settings.PASSWORD_HASHER_PROFILES[profile])()
+        try:
+            result = measure(hasher, args.repeat, args.logins)
+        except ValueError as exc:
+            # the hashing library of the profile is not installed
+            print(f"{profile}: skipped, {exc}")
+            continue
+
+        print(
+            "{profile}: hash {hash_ms}ms, verify {verify_ms}ms, "
+            "{logins_per_second} logins/s on {workers} workers".format(
+                profile=profile, **result
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
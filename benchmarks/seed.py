@@ -0,0 +1,154 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import bump_user_version
+from recipe.search import update_search_vectors
+
+
+DOMAIN = "benchmark.test"
+PASSWORD = "benchmark-pass"
+
+ADJECTIVES = ("Spicy", "Creamy", "Roasted", "Quick", "Smoky", "Zesty", "Rustic")
+DISHES = ("soup", "curry", "risotto", "salad", "stew", "pie", "noodles", "tacos")
+CUISINES = ("Vegan", "Italian", "Thai", "Mexican", "Breakfast", "Dessert")
+INGREDIENTS = ("Tomato", "Garlic", "Leek", "Rice", "Tofu", "Lemon", "Basil")
+
+
+def benchmark_users():
+    """Return the users created by the benchmark seeding"""
+    return get_user_model().objects.filter(email__endswith=f"@{DOMAIN}")
+
+
+def clear() -> None:
+    """Delete the benchmark dataset
+
+    Recipes, tags and ingredients are deleted in bulk, their signals would only
+    reindex and invalidate the cache of recipes deleted along with them.
+    """
+    users = benchmark_users()
+    Recipe.tags.through.objects.filter(recipe__user__in=users).delete()
+    Recipe.ingredients.through.objects.filter(recipe__user__in=users).delete()
+    for model in (Recipe, Tag, Ingredient):
+        queryset = model.objects.filter(user__in=users)
+        queryset._raw_delete(queryset.db)
+    users.delete()
+
+
+def _names(words, count: int):
+    return [f"{words[i % len(words)]} {i}" for i in range(count)]
+
+
+def _ids_by_user(model, users):
+    """Return the ids of a model grouped by the id of their owner"""
+    ids = {user.pk: [] for user in users}
+    rows = model.objects.filter(user__in=users).values_list("user_id", "id")
+    for user_id, pk in rows.iterator():
+        ids[user_id].append(pk)
+    return ids
+
+
+def seed(
+    recipes: int,
+    users: int = None,
+    tags_per_user: int = 20,
+    ingredients_per_user: int = 50,
+    seed: int = 0,
+    batch_size: int = 5000,
+    log=print,
+) -> dict:
+    """Replace the benchmark dataset with a synthetic one and return its size
+
+    The same arguments always produce the same names, values and relations.
+    """
+    rng = random.Random(seed)
+    users = users or max(1, recipes // 100)
+    clear()
+
+    password = make_password(PASSWORD)
+    created = get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=f"user{i}@{DOMAIN}", name=f"Benchmark user {i}", password=password
+        )
+        for i in range(users)
+    )
+    if created[0].pk is None:
+        created = list(benchmark_users().order_by("id"))
+    Token.objects.bulk_create(
+        Token(user=user, key=Token.generate_key()) for user in created
+    )
+    for user in created:
+        bump_user_version(user.pk, names=True)
+
+    for model, words, count in (
+        (Tag, CUISINES, tags_per_user),
+        (Ingredient, INGREDIENTS, ingredients_per_user),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user=user, name=name)
+                for user in created
+                for name in _names(words, count)
+            ),
+            batch_size=batch_size,
+        )
+    tag_ids = _ids_by_user(Tag, created)
+    ingredient_ids = _ids_by_user(Ingredient, created)
+
+    for start in range(0, recipes, batch_size):
+        with transaction.atomic():
+            batch = [
+                Recipe(
+                    user=created[i % users],
+                    title=f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)} {i}",
+                    time_minutes=rng.randint(5, 180),
+                    price=Decimal(rng.randint(100, 9999)) / 100,
+                )
+                for i in range(start, min(start + batch_size, recipes))
+            ]
+            Recipe.objects.bulk_create(batch)
+            if batch[0].pk is None:
+                ids = Recipe.objects.filter(user__in=created).order_by("-id")
+                ids = ids.values_list("id", flat=True)[: len(batch)]
+                for recipe, pk in zip(batch, reversed(list(ids))):
+                    recipe.pk = pk
+
+            tags, ingredients = [], []
+            for recipe in batch:
+                user_tags = tag_ids[recipe.user_id]
+                user_ingredients = ingredient_ids[recipe.user_id]
+                tags.extend(
+                    Recipe.tags.through(recipe_id=recipe.pk, tag_id=pk)
+                    for pk in rng.sample(user_tags, min(len(user_tags), 2))
+                )
+                ingredients.extend(
+                    Recipe.ingredients.through(recipe_id=recipe.pk, ingredient_id=pk)
+                    for pk in rng.sample(
+                        user_ingredients, min(len(user_ingredients), 5)
+                    )
+                )
+            Recipe.tags.through.objects.bulk_create(tags, batch_size=batch_size)
+            Recipe.ingredients.through.objects.bulk_create(
+                ingredients, batch_size=batch_size
+            )
+            update_search_vectors([recipe.pk for recipe in batch])
+
+        log(f"Seeded {start + len(batch)} of {recipes} recipes")
+
+    return dataset()
+
+
+def dataset() -> dict:
+    """Return the number of benchmark objects of each kind"""
+    users = benchmark_users()
+    return {
+        "users": users.count(),
+        "recipes": Recipe.objects.filter(user__in=users).count(),
+        "tags": Tag.objects.filter(user__in=users).count(),
+        "ingredients": Ingredient.objects.filter(user__in=users).count(),
+    }
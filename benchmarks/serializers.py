@@ -0,0 +1,113 @@
+"""Compare the time to serialize recipe lists with and without model instances
+
+Seed the benchmark dataset first, then run:
+
+    python benchmarks/serializers.py --recipes 1000
+
+Both paths read the same recipes with their tag and ingredient ids, the median
+time to fetch, serialize and render them is reported per 1,000 recipes.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recipe_book.settings")
+
+    import django
+
+    django.setup()
+
+from django.db.models import Prefetch  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from benchmarks.seed import benchmark_users  # noqa: E402
+from core.models import Ingredient, Recipe, Tag  # noqa: E402
+from recipe.serializers import RecipeRowSerializer, RecipeSerializer  # noqa: E402
+from recipe.serializers import recipe_rows  # noqa: E402
+
+
+def _instances(queryset):
+    return RecipeSerializer(
+        list(
+            queryset.prefetch_related(
+                Prefetch("ingredients", queryset=Ingredient.objects.only("id")),
+                Prefetch("tags", queryset=Tag.objects.only("id")),
+            )
+        ),
+        many=True,
+    )
+
+
+def _rows(queryset):
+    return RecipeRowSerializer(list(recipe_rows(queryset)), many=True)
+
+
+PATHS = {
+    "RecipeSerializer": _instances,
+    "RecipeRowSerializer": _rows,
+}
+
+
+def measure(queryset, repeat: int = 5) -> dict:
+    """Return the median fetch, serialize and render times of each path in ms"""
+    results = {}
+    for name, load in PATHS.items():
+        timings = {"fetch_ms": [], "serialize_ms": [], "render_ms": []}
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serializer = load(queryset)
+            fetched = time.perf_counter()
+            data = serializer.data
+            serialized = time.perf_counter()
+            JSONRenderer().render(data)
+            rendered = time.perf_counter()
+
+            timings["fetch_ms"].append((fetched - started) * 1000)
+            timings["serialize_ms"].append((serialized - fetched) * 1000)
+            timings["render_ms"].append((rendered - serialized) * 1000)
+
+        results[name] = {
+            metric: round(statistics.median(values), 2)
+            for metric, values in timings.items()
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="file to write the JSON results to")
+    args = parser.parse_args()
+
+    queryset = Recipe.objects.filter(user__in=benchmark_users()).order_by("-id")
+    queryset = queryset[: args.recipes]
+    count = queryset.count()
+    if not count:
+        sys.exit("No benchmark data, run benchmarks/suite.py seed first")
+
+    results = measure(queryset, args.repeat)
+    for name, timings in results.items():
+        per_thousand = {
+            metric: value * 1000 / count for metric, value in timings.items()
+        }
+        print(
+            "{name}: fetch {fetch_ms:.1f}ms, serialize {serialize_ms:.1f}ms, "
+            "render {render_ms:.1f}ms per 1000 recipes".format(
+                name=name, **per_thousand
+            )
+        )
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"recipes": count, "paths": results}, indent=2) + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
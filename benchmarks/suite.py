@@ -0,0 +1,383 @@
+"""Seed a synthetic dataset and measure the recipe API endpoints under load
+
+Seed the database configured by the DB_* environment variables, then run the
+endpoints in this process or against a running server:
+
+    python benchmarks/suite.py seed --recipes 100000
+    python benchmarks/suite.py run --output before.json
+    python benchmarks/suite.py run --url http://127.0.0.1:8000 --output after.json
+    python benchmarks/suite.py compare before.json after.json
+
+Every endpoint is loaded on its own by concurrent workers, each authenticated
+as a different seeded user, and results are written as JSON to diff across
+commits. Token requests are throttled per IP and email, set LOGIN_RATE_PER_IP
+and LOGIN_RATE_PER_EMAIL empty to measure logins rather than rejections.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "recipe_book.settings")
+
+    import django
+
+    django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from benchmarks.asgi_vs_wsgi import percentile  # noqa: E402
+from benchmarks.seed import DISHES, PASSWORD  # noqa: E402
+from benchmarks.seed import benchmark_users, dataset, seed  # noqa: E402
+from core.models import Recipe, Tag  # noqa: E402
+from recipe_book import __version__  # noqa: E402
+
+
+SAMPLE_SIZE = 100
+
+
+def _recipe_list(user, rng):
+    return "GET", "/api/recipe/recipes/", None
+
+
+def _recipe_list_by_tags(user, rng):
+    tags = rng.sample(user["tags"], min(len(user["tags"]), 2))
+    query = urlencode({"tags": ",".join(map(str, tags))})
+    return "GET", f"/api/recipe/recipes/?{query}", None
+
+
+def _recipe_detail(user, rng):
+    return "GET", f"/api/recipe/recipes/{rng.choice(user['recipes'])}/", None
+
+
+def _recipe_search(user, rng):
+    return "GET", f"/api/recipe/recipes/?search={rng.choice(DISHES)}", None
+
+
+def _recipe_create(user, rng):
+    payload = {
+        "title": f"Benchmark {rng.choice(DISHES)}",
+        "time_minutes": rng.randint(5, 180),
+        "price": "9.99",
+        "tags": rng.sample(user["tags"], min(len(user["tags"]), 2)),
+    }
+    return "POST", "/api/recipe/recipes/", payload
+
+
+def _tag_list(user, rng):
+    return "GET", "/api/recipe/tags/", None
+
+
+def _ingredient_list(user, rng):
+    return "GET", "/api/recipe/ingredients/", None
+
+
+def _token(user, rng):
+    return "POST", "/api/user/token/", {"email": user["email"], "password": PASSWORD}
+
+
+ENDPOINTS = {
+    "recipe-list": _recipe_list,
+    "recipe-list-tags": _recipe_list_by_tags,
+    "recipe-detail": _recipe_detail,
+    "recipe-search": _recipe_search,
+    "recipe-create": _recipe_create,
+    "tag-list": _tag_list,
+    "ingredient-list": _ingredient_list,
+    "token": _token,
+}
+
+# writes grow the dataset and skew later runs, so they are only run on request
+DEFAULT_ENDPOINTS = [name for name in ENDPOINTS if name != "recipe-create"]
+
+
+class InProcessDriver:
+    """Send requests through the Django handler of this process"""
+
+    name = "in-process"
+
+    def __init__(self, token: str):
+        self.client = Client(
+            raise_request_exception=False, HTTP_AUTHORIZATION=f"Token {token}"
+        )
+
+    def request(self, method: str, path: str, payload) -> int:
+        if method == "GET":
+            return self.client.get(path).status_code
+
+        return self.client.generic(
+            method, path, json.dumps(payload), content_type="application/json"
+        ).status_code
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPDriver:
+    """Send requests to a running server over one keep-alive connection"""
+
+    name = "http"
+
+    def __init__(self, url: str, token: str):
+        parts = urlsplit(url)
+        self.connection = HTTPConnection(parts.hostname, parts.port or 80)
+        self.headers = {"Authorization": f"Token {token}"}
+
+    def request(self, method: str, path: str, payload) -> int:
+        headers = self.headers
+        body = None
+        if payload is not None:
+            headers = {**headers, "Content-Type": "application/json"}
+            body = json.dumps(payload)
+
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response.status
+
+    def close(self):
+        self.connection.close()
+
+
+def sample_users(count: int) -> list:
+    """Return the credentials and object ids of seeded users to send requests as"""
+    users = []
+    for user in benchmark_users().order_by("id")[:count]:
+        recipes = Recipe.objects.filter(user=user).values_list("id", flat=True)
+        tags = Tag.objects.filter(user=user).values_list("id", flat=True)
+        users.append(
+            {
+                "email": user.email,
+                "token": Token.objects.get(user=user).key,
+                "recipes": list(recipes[:SAMPLE_SIZE]),
+                "tags": list(tags[:SAMPLE_SIZE]),
+            }
+        )
+    if not users:
+        raise RuntimeError("No benchmark data, run the seed command first")
+
+    return users
+
+
+def measure(
+    endpoint: str,
+    make_driver,
+    users,
+    concurrency: int,
+    requests: int,
+    warmup: int = 0,
+    seed: int = 0,
+) -> dict:
+    """Load an endpoint with concurrent workers and summarize the latencies"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index: int):
+        nonlocal errors
+        user = users[index % len(users)]
+        rng = random.Random(seed + index)
+        driver = make_driver(user["token"])
+        own, failed = [], 0
+        try:
+            try:
+                for _ in range(warmup):
+                    driver.request(*ENDPOINTS[endpoint](user, rng))
+            except Exception:
+                # release the other workers waiting for this one to start
+                barrier.abort()
+                raise
+            barrier.wait()
+            for _ in range(index, requests, concurrency):
+                request = ENDPOINTS[endpoint](user, rng)
+                started = time.perf_counter()
+                try:
+                    status = driver.request(*request)
+                except OSError:
+                    status = None
+                own.append(time.perf_counter() - started)
+                if status is None or status >= 400:
+                    failed += 1
+        finally:
+            driver.close()
+        with lock:
+            latencies.extend(own)
+            errors += failed
+
+    threads = [
+        threading.Thread(target=worker, args=(index,)) for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p90_ms": round(percentile(latencies, 0.90), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    endpoints=None,
+    url: str = None,
+    concurrency: int = 8,
+    requests: int = 500,
+    warmup: int = 5,
+    seed: int = 0,
+    log=print,
+) -> dict:
+    """Measure endpoints in this process, or against the server at url"""
+    users = sample_users(concurrency)
+    if url:
+        driver = HTTPDriver
+
+        def make_driver(token):
+            return HTTPDriver(url, token)
+
+    else:
+        driver = make_driver = InProcessDriver
+
+    results = {
+        "version": __version__,
+        "commit": _commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "driver": driver.name,
+        "url": url,
+        "concurrency": concurrency,
+        "dataset": dataset(),
+        "endpoints": {},
+    }
+    for endpoint in endpoints or DEFAULT_ENDPOINTS:
+        result = measure(
+            endpoint, make_driver, users, concurrency, requests, warmup, seed
+        )
+        results["endpoints"][endpoint] = result
+        log(
+            "{endpoint}: {requests} requests, {errors} errors, {rps} req/s, "
+            "p50 {p50_ms}ms, p90 {p90_ms}ms, p99 {p99_ms}ms".format(
+                endpoint=endpoint, **result
+            )
+        )
+
+    return results
+
+
+def compare(before: dict, after: dict):
+    """Yield the change of throughput and latencies of endpoints measured twice"""
+    yield f"{before['commit']} -> {after['commit']}"
+    for endpoint, result in after["endpoints"].items():
+        if endpoint not in before["endpoints"]:
+            continue
+
+        changes = []
+        for metric in ("rps", "p50_ms", "p99_ms"):
+            old, new = before["endpoints"][endpoint][metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            changes.append(f"{metric} {old} -> {new} ({change:+.1f}%)")
+        yield f"{endpoint}: {', '.join(changes)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="replace the benchmark dataset")
+    seed_parser.add_argument("--recipes", type=int, default=10_000)
+    seed_parser.add_argument("--users", type=int, help="recipes / 100 by default")
+    seed_parser.add_argument("--tags", type=int, default=20, help="per user")
+    seed_parser.add_argument("--ingredients", type=int, default=50, help="per user")
+    seed_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run", help="measure the endpoints")
+    run_parser.add_argument(
+        "--endpoint",
+        action="append",
+        dest="endpoints",
+        choices=list(ENDPOINTS),
+        help="endpoint to measure, every read endpoint and token by default",
+    )
+    run_parser.add_argument("--url", help="server to load instead of this process")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    run_parser.add_argument("--warmup", type=int, default=5, help="per worker")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="file to write the JSON results to")
+
+    compare_parser = commands.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        counts = seed(
+            args.recipes, args.users, args.tags, args.ingredients, seed=args.seed
+        )
+        print(json.dumps(counts))
+
+    elif args.command == "run":
+        # the test client sends requests for the testserver host
+        if "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+        results = run(
+            args.endpoints,
+            args.url,
+            args.concurrency,
+            args.requests,
+            args.warmup,
+            args.seed,
+        )
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    else:
+        before = json.loads(Path(args.before).read_text())
+        after = json.loads(Path(args.after).read_text())
+        for line in compare(before, after):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
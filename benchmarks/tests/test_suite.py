@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from benchmarks.seed import benchmark_users, seed
+from benchmarks.suite import DEFAULT_ENDPOINTS, InProcessDriver, compare, run
+from core.models import Recipe
+
+
+class SeedTest(TransactionTestCase):
+    """Test seeding the synthetic benchmark dataset"""
+
+    def test_seed_creates_dataset(self):
+        """Test seeding creates the requested number of objects"""
+        counts = seed(recipes=30, users=3, tags_per_user=4, log=lambda line: None)
+
+        self.assertEqual(
+            counts, {"users": 3, "recipes": 30, "tags": 12, "ingredients": 150}
+        )
+        recipe = Recipe.objects.filter(user__in=benchmark_users()).first()
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.ingredients.count(), 5)
+
+    def test_seed_replaces_dataset(self):
+        """Test seeding twice replaces the previous dataset"""
+        seed(recipes=10, users=2, log=lambda line: None)
+        first = list(Recipe.objects.values_list("title", "time_minutes", "price"))
+
+        counts = seed(recipes=10, users=2, log=lambda line: None)
+
+        self.assertEqual(counts["recipes"], 10)
+        self.assertEqual(
+            list(Recipe.objects.values_list("title", "time_minutes", "price")),
+            first,
+        )
+
+
+class RunTest(TransactionTestCase):
+    """Test measuring the endpoints"""
+
+    def setUp(self) -> None:
+        # token requests are throttled with counters kept in the cache
+        cache.clear()
+        seed(recipes=20, users=2, tags_per_user=4, log=lambda line: None)
+
+    def test_run_measures_endpoints(self):
+        """Test every default endpoint is measured without errors"""
+        results = run(concurrency=2, requests=6, warmup=1, log=lambda line: None)
+
+        self.assertEqual(list(results["endpoints"]), DEFAULT_ENDPOINTS)
+        self.assertEqual(results["dataset"]["recipes"], 20)
+        for endpoint, result in results["endpoints"].items():
+            self.assertEqual(result["requests"], 6, endpoint)
+            self.assertEqual(result["errors"], 0, endpoint)
+            self.assertLessEqual(result["p50_ms"], result["max_ms"])
+
+    def test_run_counts_errors(self):
+        """Test failed requests are counted as errors"""
+        driver = InProcessDriver("invalid")
+
+        self.assertEqual(driver.request("GET", "/api/recipe/tags/", None), 401)
+
+    def test_compare_results(self):
+        """Test comparing two runs reports the change per endpoint"""
+        before = {"commit": "a", "endpoints": {"tag-list": _result(100, 10, 20)}}
+        after = {"commit": "b", "endpoints": {"tag-list": _result(150, 5, 20)}}
+
+        lines = list(compare(before, after))
+
+        self.assertEqual(lines[0], "a -> b")
+        self.assertIn("rps 100 -> 150 (+50.0%)", lines[1])
+        self.assertIn("p50_ms 10 -> 5 (-50.0%)", lines[1])
+
+
+def _result(rps, p50, p99):
+    return {"rps": rps, "p50_ms": p50, "p99_ms": p99}
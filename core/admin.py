@@ -1,11 +1,34 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as t
 
 from core import models
+from recipe.search import search_recipes
+from recipe.signals import deleting
 
 
-class UserAdmin(BaseUserAdmin):
+# ids are bigint columns
+MAX_ID = 2**63 - 1
+
+
+class DeleteCascadeMixin:
+    """Reindex and invalidate recipes once per delete instead of once per row"""
+
+    def delete_model(self, request, obj):
+        with deleting(type(obj).objects.filter(pk=obj.pk)):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with deleting(queryset):
+            super().delete_queryset(request, queryset)
+
+
+class UserAdmin(DeleteCascadeMixin, BaseUserAdmin):
     ordering = ["id"]
     list_display = ["email", "name"]
     fieldsets = (
@@ -36,7 +59,88 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting the rows of a whole table from planner statistics
+
+    Counting millions of rows takes seconds on postgres, while the estimate is
+    only off by the rows changed since the table was last analyzed. Filtered
+    lists and small tables are counted exactly.
+    """
+
+    exact_count_below = 10000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                (estimate,) = cursor.fetchone()
+            # tables that were never analyzed have no estimate
+            if estimate >= self.exact_count_below:
+                return int(estimate)
+
+        return super().count
+
+
+class LargeTableAdmin(DeleteCascadeMixin, admin.ModelAdmin):
+    """Admin for tables of millions of rows owned by users
+
+    Rows are only ordered and searched through indexes, related objects are
+    edited by id instead of being listed in select boxes.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    ordering = ("-id",)
+    sortable_by = ("id",)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search by id, by owner email, or else by text"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        # int() also accepts digits of other scripts, like "²" or "٣"
+        if term.isascii() and term.isdigit():
+            if int(term) > MAX_ID:
+                return queryset.none(), False
+            return queryset.filter(pk=int(term)), False
+        if "@" in term:
+            users = get_user_model().objects.filter_email(term)
+            return queryset.filter(user__in=users), False
+
+        return self.search_text(queryset, term), False
+
+    def search_text(self, queryset, text: str):
+        """Return the rows whose first search field starts with a text, in any case"""
+        field = self.search_fields[0]
+        return queryset.alias(lower_value=Lower(field)).filter(
+            lower_value__startswith=text.lower()
+        )
+
+
+class NameAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "user")
+    search_fields = ("name",)
+
+
+class RecipeAdmin(LargeTableAdmin):
+    list_display = ("id", "title", "user", "time_minutes", "price")
+    raw_id_fields = ("user", "tags", "ingredients")
+    search_fields = ("title",)
+
+    def search_text(self, queryset, text: str):
+        """Return the recipes matching a full-text search"""
+        return search_recipes(queryset, text)
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredient)
-admin.site.register(models.Recipe)
+admin.site.register(models.Tag, NameAdmin)
+admin.site.register(models.Ingredient, NameAdmin)
+admin.site.register(models.Recipe, RecipeAdmin)
@@ -0,0 +1,38 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Postgres connection checked once per request before a persistent reuse
+
+    Backports CONN_HEALTH_CHECKS from Django 4.1, so a connection dropped by
+    the server or a pooler between two requests is replaced instead of
+    failing the next query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+        self.health_check_done = False
+
+    def connect(self):
+        # new connections are healthy, set first as connecting sets autocommit
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # called when a request starts and finishes, check before the next reuse
+        self.health_check_done = False
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+def _process_local_cache() -> bool:
+    return (
+        settings.CACHES["default"]["BACKEND"] in settings.PROCESS_LOCAL_CACHE_BACKENDS
+    )
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Require a default cache shared by every worker process in production"""
+    if not _process_local_cache():
+        return []
+
+    return [
+        Error(
+            "The default cache is local to each process, cached lists, "
+            "conditional GET and read-your-writes are disabled.",
+            hint="Set CACHE_BACKEND and CACHE_LOCATION to a shared cache, "
+            "like redis or memcached.",
+            id="core.E001",
+        )
+    ]
+
+
+@register(Tags.caches)
+def check_cache_shared_setting(app_configs, **kwargs):
+    """Warn when a process local cache is declared shared outside DEBUG"""
+    if settings.DEBUG or not settings.CACHE_SHARED or not _process_local_cache():
+        return []
+
+    return [
+        Warning(
+            "CACHE_SHARED is set while the default cache is local to each "
+            "process, workers can serve each other's stale data.",
+            hint="Only run a single process, or use a shared cache.",
+            id="core.W001",
+        )
+    ]
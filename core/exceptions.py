@@ -0,0 +1,12 @@
+from rest_framework import views
+from rest_framework.exceptions import Throttled
+
+from core.hashers import HasherPoolFull
+
+
+def exception_handler(exc, context):
+    """Answer errors of API views, a full hasher pool as too many requests"""
+    if isinstance(exc, HasherPoolFull):
+        exc = Throttled(wait=exc.retry_after, detail=str(exc))
+
+    return views.exception_handler(exc, context)
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher with the iterations of the settings"""
+
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 hasher with the costs of the settings, requires argon2-cffi"""
+
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """Bcrypt hasher with the rounds of the settings, requires bcrypt"""
+
+    rounds = settings.PASSWORD_BCRYPT_ROUNDS
+
+
+class HasherPoolFull(Exception):
+    """The hasher pool has no room left, the hash may be retried shortly"""
+
+    retry_after = 1
+
+
+class HasherPool:
+    """Bounded pool of threads computing password hashes
+
+    Hashing libraries release the GIL, so hashes run in parallel on at most
+    `workers` cores and a burst of logins leaves the other cores to the API.
+    Calls beyond `queue_size` waiting hashes are rejected instead of queued.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="hasher")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, function, *args):
+        """Run a hashing function in the pool and return its result"""
+        return self.submit(function, *args).result()
+
+    def map(self, function, items) -> list:
+        """Run a hashing function on each item, at most `workers` at a time"""
+        results = []
+        for start in range(0, len(items), self.workers):
+            futures = [
+                self.submit(function, item)
+                for item in items[start : start + self.workers]
+            ]
+            results.extend(future.result() for future in futures)
+        return results
+
+    def submit(self, function, *args) -> Future:
+        """Schedule a hashing function in the pool"""
+        if not self.slots.acquire(blocking=False):
+            raise HasherPoolFull("Too many passwords being checked, try again shortly.")
+
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+
+hasher_pool = HasherPool(
+    settings.PASSWORD_HASHER_WORKERS, settings.PASSWORD_HASHER_QUEUE_SIZE
+)
+
+
+def make_password(password: str) -> str:
+    """Hash a password with the preferred hasher in the hasher pool"""
+    return hasher_pool.run(hashers.make_password, password)
+
+
+def check_password(password: str, encoded: str):
+    """Verify a password in the hasher pool
+
+    Return whether it is correct and whether its hash should be upgraded to
+    the preferred hasher or to the current cost.
+    """
+    outdated = []
+    correct = hasher_pool.run(
+        hashers.check_password, password, encoded, outdated.append
+    )
+    return correct, bool(outdated)
@@ -0,0 +1,247 @@
+import csv
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import invalidate_user
+from recipe.search import update_search_vectors
+
+
+RECIPE_FIELDS = ("title", "time_minutes", "price", "link")
+LIST_SEPARATOR = "|"
+INSERT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """django command to stream recipes from a NDJSON or CSV dump into the db"""
+
+    help = (
+        "Import recipes from a NDJSON or CSV file, like the ones produced by "
+        "/api/recipe/export/. Tags and ingredients are referenced by name and "
+        "created for the recipe owner when missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to import, - to read from stdin")
+        parser.add_argument(
+            "--user",
+            help="email of the owner of rows without a user column",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("ndjson", "csv"),
+            help="format of the file, guessed from its extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="number of rows imported per transaction",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+        self.default_email = options["user"]
+        self.user_ids = {}
+        self.attribute_ids = {Tag: {}, Ingredient: {}}
+        self.loaded_owners = {Tag: set(), Ingredient: set()}
+        self.imported = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+
+        if self.default_email and self._user_id(self.default_email) is None:
+            raise CommandError(f"User {self.default_email} does not exist")
+
+        try:
+            file = (
+                sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+            )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        try:
+            rows = (
+                self._read_csv(file)
+                if file_format == "csv"
+                else self._read_ndjson(file)
+            )
+            batch = []
+            for line, row in rows:
+                recipe = self._parse_row(line, row)
+                if recipe is None:
+                    continue
+
+                batch.append(recipe)
+                if len(batch) == self.batch_size:
+                    self._import_batch(batch)
+                    batch = []
+
+            if batch:
+                self._import_batch(batch)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        for user_id in self.user_ids.values():
+            if user_id is not None:
+                invalidate_user(user_id, names=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {self.imported} recipes, skipped {self.skipped} rows "
+                f"in {time.monotonic() - self.started:.1f}s ({self._rate():.0f} rows/s)"
+            )
+        )
+
+    def _read_ndjson(self, file):
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError as exc:
+                self._skip(line, f"invalid JSON ({exc})")
+
+    def _read_csv(self, file):
+        # the header is line 1
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            for name in ("tags", "ingredients"):
+                value = row.get(name) or ""
+                row[name] = [item for item in value.split(LIST_SEPARATOR) if item]
+            yield line, row
+
+    def _parse_row(self, line: int, row):
+        """Return the recipe fields, owner and relation names of a row"""
+        if not isinstance(row, dict):
+            self._skip(line, "expected an object")
+            return None
+
+        email = row.get("user") or self.default_email
+        if not isinstance(email, str):
+            self._skip(line, "user must be an email")
+            return None
+
+        user_id = self._user_id(email)
+        if user_id is None:
+            self._skip(line, "unknown user")
+            return None
+
+        fields = {"user_id": user_id}
+        try:
+            for name in RECIPE_FIELDS:
+                field = Recipe._meta.get_field(name)
+                value = row.get(name)
+                fields[name] = field.clean("" if value is None else value, None)
+
+            relations = {
+                Tag: self._names(row.get("tags")),
+                Ingredient: self._names(row.get("ingredients")),
+            }
+        except ValidationError as exc:
+            self._skip(line, "; ".join(exc.messages))
+            return None
+
+        return fields, relations
+
+    def _names(self, values):
+        """Return the names of relations given as names or serialized objects"""
+        if values is None:
+            return []
+        if not isinstance(values, list):
+            raise ValidationError(f"Expected a list of names: {values!r}")
+
+        names = []
+        for value in values:
+            name = value.get("name") if isinstance(value, dict) else value
+            if not isinstance(name, str) or not name.strip():
+                raise ValidationError(f"Invalid name: {value!r}")
+            names.append(Tag._meta.get_field("name").clean(name.strip(), None))
+        return names
+
+    def _user_id(self, email):
+        """Return the id of a user by email, remembering the lookups"""
+        if not email:
+            return None
+
+        email = email.lower()
+        if email not in self.user_ids:
+            user = get_user_model().objects.filter_email(email).only("id").first()
+            self.user_ids[email] = user.id if user else None
+        return self.user_ids[email]
+
+    def _import_batch(self, batch):
+        with transaction.atomic():
+            for model in (Tag, Ingredient):
+                self._create_missing_attributes(model, batch)
+
+            recipes = Recipe.objects.bulk_create(
+                [Recipe(**fields) for fields, _ in batch],
+                batch_size=INSERT_BATCH_SIZE,
+            )
+            for model, relation in ((Tag, "tags"), (Ingredient, "ingredients")):
+                self._create_relations(model, relation, recipes, batch)
+            update_search_vectors([recipe.id for recipe in recipes])
+
+        self.imported += len(batch)
+        self.stdout.write(
+            f"Imported {self.imported} recipes ({self._rate():.0f} rows/s)"
+        )
+
+    def _create_missing_attributes(self, model, batch):
+        """Make sure every tag or ingredient named in the batch has a known id"""
+        ids = self.attribute_ids[model]
+        for user_id in {fields["user_id"] for fields, _ in batch}:
+            # existing names of a user are loaded once, the first time it is seen
+            if user_id not in self.loaded_owners[model]:
+                self.loaded_owners[model].add(user_id)
+                existing = model.objects.filter(user_id=user_id).order_by("id")
+                for pk, name in existing.values_list("id", "name"):
+                    ids.setdefault((user_id, name), pk)
+
+        missing = {
+            (fields["user_id"], name)
+            for fields, relations in batch
+            for name in relations[model]
+            if (fields["user_id"], name) not in ids
+        }
+        created = model.objects.bulk_create(
+            [model(user_id=user_id, name=name) for user_id, name in missing],
+            batch_size=INSERT_BATCH_SIZE,
+        )
+        for obj in created:
+            ids[(obj.user_id, obj.name)] = obj.id
+
+    def _create_relations(self, model, relation, recipes, batch):
+        """Insert the m2m rows linking the recipes of a batch to tags or ingredients"""
+        through = getattr(Recipe, relation).through
+        target = f"{model._meta.model_name}_id"
+        ids = self.attribute_ids[model]
+        rows = []
+        for recipe, (fields, relations) in zip(recipes, batch):
+            # dict.fromkeys drops names repeated in a row and keeps the order
+            attribute_ids = (
+                ids[(fields["user_id"], name)] for name in relations[model]
+            )
+            for attribute_id in dict.fromkeys(attribute_ids):
+                rows.append(through(**{"recipe_id": recipe.id, target: attribute_id}))
+
+        through.objects.bulk_create(rows, batch_size=INSERT_BATCH_SIZE)
+
+    def _skip(self, line: int, reason: str):
+        self.skipped += 1
+        self.stderr.write(f"Skipping line {line}: {reason}")
+
+    def _rate(self) -> float:
+        return self.imported / max(time.monotonic() - self.started, 1e-9)
@@ -0,0 +1,76 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user.provisioning import FORMATS, Provisioner, parse_rows
+
+
+class Command(BaseCommand):
+    """django command to create users in bulk from a NDJSON or CSV file"""
+
+    help = (
+        "Create users from a NDJSON or CSV file with email, name and password "
+        "fields. Rows that are invalid or whose email is taken are reported "
+        "and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to import, - to read from stdin")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="format of the file, guessed from its extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PROVISIONING_BATCH_SIZE,
+            help="number of users inserted per transaction",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PROVISIONING_WORKERS,
+            help="number of processes hashing passwords",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        started = time.monotonic()
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        try:
+            file = (
+                sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+            )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        try:
+            provisioner = Provisioner(options["batch_size"], options["workers"])
+            report = provisioner.run(parse_rows(file, file_format))
+        except UnicodeDecodeError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        for error in report["errors"]:
+            reasons = "; ".join(
+                f"{field}: {' '.join(str(message) for message in messages)}"
+                for field, messages in error["errors"].items()
+            )
+            self.stderr.write(f"Skipping line {error['line']}: {reasons}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']} users, skipped {report['failed']} rows "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
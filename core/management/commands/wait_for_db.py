@@ -1,21 +1,85 @@
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+
+BASE_DELAY = 0.1
+
+
+def check_database(alias: str) -> None:
+    """Run a cheap query on a database, raise OperationalError when unavailable"""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        connection.close()
 
 
 class Command(BaseCommand):
     """django comment to pause execution until db is available"""
 
+    help = (
+        "Wait until the databases answer a query, retrying with an exponential "
+        "and jittered backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            action="append",
+            dest="databases",
+            help="alias of a database to wait for, every database by default",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="seconds to wait for before failing",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="longest wait in seconds between two attempts",
+        )
+
     def handle(self, *args, **options):
+        aliases = options["databases"] or list(connections)
+        self.deadline = time.monotonic() + options["timeout"]
+        self.max_delay = options["max_delay"]
+
         self.stdout.write("Waiting for DB")
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("DB unaivailable, waiting 1 second...")
-                time.sleep(1)
+        # connections are per thread, so every database is checked on its own
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            errors = [error for error in executor.map(self.wait_for, aliases) if error]
+
+        if errors:
+            raise CommandError("\n".join(errors))
 
         self.stdout.write(self.style.SUCCESS("DB available"))
+
+    def wait_for(self, alias: str):
+        """Retry a database until it answers, return an error past the deadline"""
+        attempt = 0
+        while True:
+            try:
+                check_database(alias)
+                return None
+            except OperationalError as exc:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    return f"Database {alias} unavailable: {exc}"
+
+                # full jitter keeps restarted containers from retrying in lockstep
+                delay = random.uniform(0, min(self.max_delay, BASE_DELAY * 2**attempt))
+                delay = min(delay, remaining)
+                self.stdout.write(
+                    f"Database {alias} unavailable, waiting {delay:.2f} seconds..."
+                )
+                time.sleep(delay)
+                attempt += 1
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:52
+
+import core.operations
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # indexes of large tables are built without blocking writes
+    atomic = False
+
+    dependencies = [
+        ('core', '0004_recipe'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name'], name='core_ingredient_user_name_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='core_recipe_user_id_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='core_tag_user_name_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:25
+
+import core.models
+import core.operations
+from django.db import migrations
+from django.db.models import Count
+import django.db.models.functions.text
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Lower = django.db.models.functions.text.Lower
+    conflicts = list(
+        User.objects.values(lower_email=Lower('email'))
+        .annotate(users=Count('id'))
+        .filter(users__gt=1)
+        .values_list('lower_email', flat=True)[:20]
+    )
+    # accounts that only differ by case cannot be merged without a decision
+    if conflicts:
+        raise RuntimeError(
+            'Users share these emails in different cases, merge or rename them '
+            'before migrating: ' + ', '.join(conflicts)
+        )
+
+    User.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    # indexes of large tables are built without blocking writes
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop, atomic=True),
+        core.operations.AddIndexConcurrently(
+            model_name='user',
+            index=core.models.UniqueIndex(django.db.models.functions.text.Lower('email'), name='core_user_email_lower_uniq'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:28
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+NAME_INDEXES = {
+    model_name: models.Index(
+        django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('name'), name='text_pattern_ops'),
+        name=f'core_{model_name}_name_idx',
+    )
+    for model_name in ('ingredient', 'tag')
+}
+
+
+def add_name_indexes(apps, schema_editor):
+    # operator classes only exist on postgres
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for model_name, index in NAME_INDEXES.items():
+        schema_editor.add_index(apps.get_model('core', model_name), index, concurrently=True)
+
+
+def remove_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for model_name, index in NAME_INDEXES.items():
+        schema_editor.remove_index(apps.get_model('core', model_name), index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+
+    # indexes of large tables are built without blocking writes
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in NAME_INDEXES.items()
+            ],
+            database_operations=[
+                migrations.RunPython(add_name_indexes, remove_name_indexes),
+            ],
+        ),
+    ]
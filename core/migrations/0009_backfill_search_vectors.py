@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:58
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def names(model):
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('name', ' '))
+        .values('names')
+    )
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # full-text search is only backed by the database on postgres
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Recipe = apps.get_model('core', 'Recipe')
+    document = (
+        SearchVector('title', weight='A', config='english')
+        + SearchVector(names(apps.get_model('core', 'Tag')), weight='B', config='english')
+        + SearchVector(names(apps.get_model('core', 'Ingredient')), weight='B', config='english')
+    )
+    pending = Recipe.objects.filter(search_vector__isnull=True).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return
+
+        # each batch commits on its own, only locking its own recipes meanwhile
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Recipe.objects.filter(id__in=ids).update(search_vector=document)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    # recipes are indexed in batches instead of one transaction over the table
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -6,6 +9,23 @@ from django.contrib.auth.models import (
 )
 from django.conf import settings
 
+from core.hashers import check_password, make_password
+
+
+class UniqueIndex(models.Index):
+    """Index rejecting duplicate values, of fields or of expressions
+
+    Unique constraints only take plain fields before Django 4.0.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        statement = super().create_sql(model, schema_editor, using=using, **kwargs)
+        # backends pick their own CREATE INDEX template, concurrent or not
+        statement.template = statement.template.replace(
+            "CREATE INDEX", "CREATE UNIQUE INDEX", 1
+        )
+        return statement
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email: str, password: str = None, **extra_fields):
@@ -28,6 +48,19 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def filter_email(self, *emails: str):
+        """Return the users with any of these emails, in any case
+
+        The lookup is served by the unique index on the lowercased email.
+        """
+        return self.alias(lower_email=Lower("email")).filter(
+            lower_email__in=[email.lower() for email in emails]
+        )
+
+    def get_by_natural_key(self, email: str):
+        """Return the user logging in with an email, in any case"""
+        return self.filter_email(email).get()
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     """Custom user model using email instead of username"""
@@ -41,6 +74,32 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "email"
 
+    class Meta:
+        indexes = [
+            UniqueIndex(Lower("email"), name="core_user_email_lower_uniq"),
+        ]
+
+    def clean(self):
+        """Store emails lowercased, like UserManager.create_user does"""
+        super().clean()
+        if self.email:
+            self.email = self.email.lower()
+
+    def set_password(self, raw_password):
+        """Hash a password in the hasher pool, off the request thread"""
+        self.password = make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password) -> bool:
+        """Verify a password, upgrading its hash to the preferred hasher and cost"""
+        correct, outdated = check_password(raw_password, self.password)
+        if correct and outdated:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return correct
+
 
 class Tag(models.Model):
     """Tag to be used for recipe classification"""
@@ -48,6 +107,16 @@ class Tag(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "name"], name="core_tag_user_name_idx"),
+            # admin searches match name prefixes in any case
+            models.Index(
+                OpClass(Lower("name"), name="text_pattern_ops"),
+                name="core_tag_name_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -58,6 +127,16 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "name"], name="core_ingredient_user_name_idx"),
+            # admin searches match name prefixes in any case
+            models.Index(
+                OpClass(Lower("name"), name="text_pattern_ops"),
+                name="core_ingredient_name_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -72,6 +151,13 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField("Ingredient")
     tags = models.ManyToManyField("Tag")
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="core_recipe_user_id_idx"),
+            GinIndex(fields=["search_vector"], name="core_recipe_search_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
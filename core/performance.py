@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Measurements of a single request, also used as a database execute wrapper"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def _measure(execute, sql, params, many, context):
+    """Count a query towards the metrics of the request running it, if any"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def measure_connection(sender, connection, **kwargs):
+    """Wrap the queries of every connection, whichever thread runs the view
+
+    Connections belong to a thread, under ASGI views run in a worker thread
+    while the middleware runs in the event loop. The request metrics follow
+    the view through their context variable.
+    """
+    if _measure not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_measure)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram of observations per endpoint"""
+
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.series[labels] = (counts, total + value)
+
+    def render(self):
+        """Yield the lines of the histogram in the Prometheus text format"""
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for (view, method), (counts, total) in sorted(self.series.items()):
+            labels = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+HISTOGRAMS = {
+    "duration": Histogram(
+        "recipebook_request_duration_seconds",
+        "Wall time of requests.",
+        DURATION_BUCKETS,
+    ),
+    "db_queries": Histogram(
+        "recipebook_request_db_queries",
+        "Database queries run by requests.",
+        QUERY_BUCKETS,
+    ),
+    "db_time": Histogram(
+        "recipebook_request_db_seconds",
+        "Time requests spent in database queries.",
+        DURATION_BUCKETS,
+    ),
+    "serializer_time": Histogram(
+        "recipebook_request_serializer_seconds",
+        "Time requests spent serializing objects.",
+        DURATION_BUCKETS,
+    ),
+    "response_bytes": Histogram(
+        "recipebook_response_size_bytes",
+        "Size of response bodies, streamed responses excluded.",
+        SIZE_BUCKETS,
+    ),
+}
+_lock = threading.Lock()
+
+
+class TimedSerializerMixin:
+    """Count the time spent building serializer data towards the request metrics"""
+
+    @property
+    def data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return super().data
+
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class PerformanceMiddleware:
+    """Measure requests for Server-Timing headers, log lines and /metrics"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # tells the handler that __call__ returns a coroutine
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    def record(self, request, response, metrics, duration):
+        """Add the measurements of a request to its response, log and histograms"""
+        size = None if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join(
+            (
+                f"total;dur={duration * 1000:.1f}",
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f"serializer;dur={metrics.serializer_time * 1000:.1f}",
+            )
+        )
+
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "view": view,
+                        "status": response.status_code,
+                        "duration_ms": round(duration * 1000, 3),
+                        "db_queries": metrics.queries,
+                        "db_ms": round(metrics.db_time * 1000, 3),
+                        "serializer_ms": round(metrics.serializer_time * 1000, 3),
+                        "response_bytes": size,
+                    }
+                )
+            )
+
+        labels = (view, request.method)
+        with _lock:
+            HISTOGRAMS["duration"].observe(labels, duration)
+            HISTOGRAMS["db_queries"].observe(labels, metrics.queries)
+            HISTOGRAMS["db_time"].observe(labels, metrics.db_time)
+            HISTOGRAMS["serializer_time"].observe(labels, metrics.serializer_time)
+            if size is not None:
+                HISTOGRAMS["response_bytes"].observe(labels, size)
+
+        return response
+
+
+def metrics(request):
+    """Expose the request histograms and the METRICS_COLLECTORS of this process
+
+    The Prometheus text format is used. Scrapers authenticate with the
+    METRICS_TOKEN bearer token, without one the endpoint is not served.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not constant_time_compare(request.headers.get("Authorization", ""), expected):
+        response = HttpResponse("Invalid metrics token.\n", status=401)
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+
+    with _lock:
+        lines = [
+            line for histogram in HISTOGRAMS.values() for line in histogram.render()
+        ]
+    for collector in settings.METRICS_COLLECTORS:
+        lines.extend(import_string(collector)())
+
+    return HttpResponse(
+        "\n".join(lines) + "\n", content_type="text/plain; version=0.0.4"
+    )
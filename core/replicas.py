@@ -0,0 +1,126 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.module_loading import import_string
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# credentials must never lag behind, a new token or session is used right
+# after creation
+PRIMARY_MODELS = (
+    "authtoken.token",
+    "sessions.session",
+    settings.AUTH_USER_MODEL.lower(),
+)
+
+_replica_reads = ContextVar("replica_reads", default=None)
+
+
+def _authenticated_user_id(request):
+    """Return the id of the user a view authenticated the request as, if any"""
+    # the lazy user of the authentication middleware would query the session,
+    # views set a user instance once they authenticated the request
+    user = vars(request).get("user")
+    if issubclass(type(user), get_user_model()):
+        return user.pk
+    return None
+
+
+class ReplicaReads:
+    """Whether the reads of a safe request may go to a replica
+
+    Users who changed their recipe data in the last REPLICA_STICKY_SECONDS
+    read from the primary, so what they just wrote is read back before the
+    replicas caught up. The user is only known once the view authenticated
+    the request, the decision is taken on its first read after that. A
+    single replica serves every read of the request, so they all see the
+    same point in time.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.sticky = None
+        self.replica = random.choice(settings.DATABASE_REPLICAS)
+
+    def database(self) -> str:
+        if self.sticky is None:
+            user_id = _authenticated_user_id(self.request)
+            if user_id is None:
+                return self.replica
+            wrote_within = import_string(settings.REPLICA_RECENT_WRITE)
+            self.sticky = wrote_within(user_id, settings.REPLICA_STICKY_SECONDS)
+
+        if self.sticky:
+            return "default"
+        return self.replica
+
+
+class ReplicaRouter:
+    """Route reads of safe requests to a replica and everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        reads = _replica_reads.get()
+        if reads is not None and model._meta.label_lower not in PRIMARY_MODELS:
+            return reads.database()
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Allow replica reads for safe requests of users that did not write lately
+
+    The time of the last write of each user is kept in the cache, replicas
+    are only read when that cache is shared by every worker.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # tells the handler that __call__ returns a coroutine
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def reads_replica(self, request) -> bool:
+        return (
+            request.method in SAFE_METHODS
+            and settings.CACHE_SHARED
+            and bool(settings.DATABASE_REPLICAS)
+        )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.reads_replica(request):
+            return self.get_response(request)
+
+        token = _replica_reads.set(ReplicaReads(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+
+    async def __acall__(self, request):
+        if not self.reads_replica(request):
+            return await self.get_response(request)
+
+        # the view running in a worker thread inherits the context variable
+        token = _replica_reads.set(ReplicaReads(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
@@ -1,4 +1,13 @@
-from django.test import TestCase, Client
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.admin import EstimatedCountPaginator, RecipeAdmin
+from core.models import Recipe, Tag
+from core.tests.utils import Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -40,3 +49,109 @@ class AdminSiteTest(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
+
+
+class LargeTableAdminTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@test.com",
+            password="test123",
+        )
+        self.client.force_login(self.admin_user)
+
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com",
+            password="test123",
+        )
+        self.tag = Tag.objects.create(user=self.user, name="Spicy")
+        Tag.objects.create(user=self.admin_user, name="Sweet")
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="Green curry", time_minutes=30, price=10
+        )
+        self.recipe.tags.add(self.tag)
+
+    def test_recipe_change_page_edits_relations_by_id(self):
+        """Test the recipe form does not list every tag and ingredient"""
+        url = reverse("admin:core_recipe_change", args=[self.recipe.id])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "vManyToManyRawIdAdminField")
+        self.assertNotContains(response, "Sweet")
+
+    def test_recipe_list_loads_owners_in_one_query(self):
+        """Test the recipe list does not query the owner of each row"""
+        url = reverse("admin:core_recipe_changelist")
+        with CaptureQueriesContext(connection) as one_recipe:
+            self.client.get(url)
+        for i in range(5):
+            Recipe.objects.create(
+                user=self.admin_user, title=f"Recipe {i}", time_minutes=5, price=1
+            )
+
+        with self.assertNumQueries(len(one_recipe)):
+            response = self.client.get(url)
+
+        self.assertContains(response, self.user.email)
+
+    def test_search_recipes(self):
+        """Test searching recipes by text, id and owner email"""
+        other = Recipe.objects.create(
+            user=self.admin_user, title="Lemon tart", time_minutes=60, price=5
+        )
+        url = reverse("admin:core_recipe_changelist")
+
+        for term in ("curry", str(self.recipe.id), "USER@test.com"):
+            response = self.client.get(url, {"q": term})
+
+            self.assertEqual(list(response.context["cl"].result_list), [self.recipe])
+        response = self.client.get(url, {"q": "tart"})
+        self.assertEqual(list(response.context["cl"].result_list), [other])
+
+    def test_search_numbers_beyond_ids(self):
+        """Test numbers beyond the id range match nothing without a text search"""
+        url = reverse("admin:core_recipe_changelist")
+
+        with patch.object(RecipeAdmin, "search_text") as search_text:
+            response = self.client.get(url, {"q": "9" * 20})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [])
+        search_text.assert_not_called()
+
+    def test_search_other_digits_by_text(self):
+        """Test digits other than ASCII ones search by text instead of failing"""
+        url = reverse("admin:core_recipe_changelist")
+
+        response = self.client.get(url, {"q": "²"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [])
+
+    def test_search_tags_by_name_prefix(self):
+        """Test searching tags matches the start of their name in any case"""
+        url = reverse("admin:core_tag_changelist")
+
+        response = self.client.get(url, {"q": "SPI"})
+
+        self.assertEqual(list(response.context["cl"].result_list), [self.tag])
+
+
+class EstimatedCountPaginatorTest(TestCase):
+
+    @skipUnless(connection.vendor == "postgresql", "planner statistics of postgres")
+    def test_count_whole_table_from_statistics(self):
+        """Test a whole table is counted from statistics, a filtered one exactly"""
+        user = get_user_model().objects.create_user("user@test.com", "test123")
+        Tag.objects.bulk_create(Tag(user=user, name=f"Tag {i}") for i in range(20))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE core_tag")
+        Tag.objects.create(user=user, name="Unanalyzed")
+        paginator = EstimatedCountPaginator
+
+        with patch.object(paginator, "exact_count_below", 10):
+            self.assertEqual(paginator(Tag.objects.order_by("id"), 10).count, 20)
+            self.assertEqual(paginator(Tag.objects.filter(user=user), 10).count, 21)
+        self.assertEqual(paginator(Tag.objects.order_by("id"), 10).count, 21)
@@ -0,0 +1,52 @@
+from unittest import skipUnless
+
+from django.db import connections
+from django.test import TransactionTestCase
+
+from core.backends.postgresql.base import DatabaseWrapper
+
+
+connection = connections["default"]
+
+
+@skipUnless(isinstance(connection, DatabaseWrapper), "requires the core backend")
+class HealthCheckTest(TransactionTestCase):
+    """Test persistent connections are checked before being reused"""
+
+    def setUp(self) -> None:
+        self.settings_dict = dict(connection.settings_dict)
+        connection.settings_dict.update(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        connection.health_check_enabled = True
+        connection.close()
+        connection.ensure_connection()
+
+    def tearDown(self) -> None:
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(self.settings_dict)
+        connection.health_check_enabled = self.settings_dict["CONN_HEALTH_CHECKS"]
+
+    def test_healthy_connection_reused(self):
+        """Test a working connection is kept for the next request"""
+        reused = connection.connection
+
+        connection.close_if_unusable_or_obsolete()
+        self._select_one()
+
+        self.assertIs(connection.connection, reused)
+
+    def test_broken_connection_replaced(self):
+        """Test a connection dropped between two requests is replaced"""
+        broken = connection.connection
+        broken.close()
+
+        connection.close_if_unusable_or_obsolete()
+        self._select_one()
+
+        self.assertIsNot(connection.connection, broken)
+
+    # Helpers
+    def _select_one(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            return cursor.fetchone()
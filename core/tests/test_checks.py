@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_cache_shared_setting, check_shared_cache
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+REDIS = {"default": {"BACKEND": "django_redis.cache.RedisCache"}}
+
+
+class CacheCheckTest(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM)
+    def test_process_local_cache_fails_deploy_check(self):
+        """Test deploying with a process local cache is an error"""
+        errors = check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(CACHES=REDIS)
+    def test_shared_cache_passes_deploy_check(self):
+        """Test deploying with a shared cache passes"""
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES=LOCMEM, CACHE_SHARED=True, DEBUG=False)
+    def test_process_local_cache_declared_shared_warns(self):
+        """Test declaring a process local cache shared outside DEBUG warns"""
+        warnings = check_cache_shared_setting(None)
+
+        self.assertEqual([warning.id for warning in warnings], ["core.W001"])
@@ -1,25 +1,222 @@
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connections
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+
+from core.management.commands.wait_for_db import check_database
+from core.models import Ingredient, Recipe, Tag
 
 
 class CommandTest(TestCase):
 
     def test_wait_for_db_ready(self):
         """test waiting for db when db available"""
-        with patch("django.db.utils.ConnectionHandler.__getitem__") as getitem:
-            getitem.return_value = True
-            call_command("wait_for_db")
+        with patch("core.management.commands.wait_for_db.check_database") as check:
+            call_command("wait_for_db", database=["default"])
 
-            self.assertEqual(getitem.call_count, 1)
+            self.assertEqual(check.call_count, 1)
 
     @patch("time.sleep", return_value=True)
     def test_wait_for_db(self, ts):
         """test waiting for db"""
-        with patch("django.db.utils.ConnectionHandler.__getitem__") as getitem:
-            getitem.side_effect = [OperationalError] * 5 + [True]
-            call_command("wait_for_db")
+        with patch("core.management.commands.wait_for_db.check_database") as check:
+            check.side_effect = [OperationalError] * 5 + [None]
+            call_command("wait_for_db", database=["default"])
+
+            self.assertEqual(check.call_count, 6)
+
+        delays = [call.args[0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        self.assertTrue(all(0 <= delay <= 0.1 * 2**i for i, delay in enumerate(delays)))
+
+    @patch("time.sleep", return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """test waiting for db fails once the timeout is over"""
+        with patch("core.management.commands.wait_for_db.check_database") as check:
+            check.side_effect = OperationalError("connection refused")
+
+            with self.assertRaisesMessage(CommandError, "connection refused"):
+                call_command("wait_for_db", timeout=0)
+
+    def test_wait_for_db_queries_every_database(self):
+        """test waiting for db runs a query on every configured database"""
+        with patch(
+            "core.management.commands.wait_for_db.check_database",
+            wraps=check_database,
+        ) as check:
+            call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(call.args[0] for call in check.call_args_list), sorted(connections)
+        )
+
+
+class ImportRecipesCommandTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+
+    @skipUnlessDBFeature("can_return_rows_from_bulk_insert")
+    def test_import_ndjson(self):
+        """test importing recipes deduplicates tags and ingredients per user"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        rows = [
+            {
+                "title": "Soup",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": ["Vegan", "Quick"],
+                "ingredients": ["Leek", "Leek"],
+            },
+            {
+                "title": "Stew",
+                "time_minutes": 90,
+                "price": "12.50",
+                "link": "https://stew.test",
+                "tags": [{"id": 1, "name": "Quick"}],
+                "ingredients": [{"id": 2, "name": "Leek"}],
+            },
+        ]
+
+        out = self._import(self._write("\n".join(json.dumps(row) for row in rows)))
+
+        self.assertIn("Imported 2 recipes", out)
+        self.assertEqual(
+            sorted(Tag.objects.filter(user=self.user).values_list("name", flat=True)),
+            ["Quick", "Vegan"],
+        )
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        soup = Recipe.objects.get(user=self.user, title="Soup")
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(soup.ingredients.count(), 1)
+        stew = Recipe.objects.get(user=self.user, title="Stew")
+        self.assertEqual(stew.link, "https://stew.test")
+        self.assertEqual(str(stew.price), "12.50")
+
+    @skipUnlessDBFeature("can_return_rows_from_bulk_insert")
+    def test_import_csv_in_batches(self):
+        """test importing recipes from a csv file over several batches"""
+        lines = ["title,time_minutes,price,tags,ingredients"] + [
+            f"Recipe {i},10,5.00,Vegan|Quick,Tofu" for i in range(5)
+        ]
+
+        out = self._import(self._write("\n".join(lines), ".csv"), "--batch-size=2")
+
+        self.assertIn("Imported 5 recipes", out)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(title="Recipe 4")
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.ingredients.get().name, "Tofu")
+
+    def test_import_skips_invalid_rows(self):
+        """test invalid rows are reported and skipped"""
+        rows = [
+            json.dumps({"title": "Soup", "time_minutes": 10, "price": "5"}),
+            json.dumps({"title": "Stew", "time_minutes": "long", "price": "5"}),
+            "not json",
+            json.dumps(
+                {"title": "Salad", "time_minutes": 5, "price": "2", "user": "x"}
+            ),
+            json.dumps({"title": "Salad", "time_minutes": 5, "price": "2", "user": 5}),
+            json.dumps({"title": "Salad", "time_minutes": 5, "price": "2", "tags": 5}),
+        ]
+        err = StringIO()
+
+        out = self._import(self._write("\n".join(rows)), stderr=err)
+
+        self.assertIn("Imported 1 recipes, skipped 5 rows", out)
+        self.assertIn("Skipping line 2", err.getvalue())
+        self.assertIn("Skipping line 3", err.getvalue())
+        self.assertIn("Skipping line 4: unknown user", err.getvalue())
+        self.assertIn("Skipping line 5: user must be an email", err.getvalue())
+        self.assertIn("Skipping line 6: Expected a list", err.getvalue())
+        self.assertEqual(Recipe.objects.get().title, "Soup")
+
+    def test_import_unknown_user_fails(self):
+        """test importing for a user that does not exist fails"""
+        with self.assertRaises(CommandError):
+            call_command("import_recipes", self._write(""), user="nobody@test.com")
+
+    def test_import_batch_size_must_be_positive(self):
+        """test a batch size below one is rejected before reading the file"""
+        for batch_size in ("0", "-1"):
+            with self.assertRaisesMessage(CommandError, "--batch-size"):
+                self._import(self._write(""), f"--batch-size={batch_size}")
+
+    # Helpers
+    def _write(self, content, suffix=".ndjson"):
+        file, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(file, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _import(self, path, *args, **kwargs):
+        out = StringIO()
+        call_command(
+            "import_recipes", path, *args, user=self.user.email, stdout=out, **kwargs
+        )
+        return out.getvalue()
+
+
+@override_settings(PROVISIONING_WORKERS=2)
+class ProvisionUsersCommandTest(TestCase):
+    def test_provision_csv_in_batches(self):
+        """test provisioning users from a csv file over several batches"""
+        lines = ["email,name,password"] + [
+            f"user{i}@test.com,User {i},secret{i}" for i in range(5)
+        ]
+        out = StringIO()
+
+        call_command(
+            "provision_users",
+            self._write("\n".join(lines), ".csv"),
+            batch_size=2,
+            stdout=out,
+        )
+
+        self.assertIn("Created 5 users, skipped 0 rows", out.getvalue())
+        user = get_user_model().objects.get(email="user4@test.com")
+        self.assertTrue(user.check_password("secret4"))
+
+    def test_provision_batch_size_must_be_positive(self):
+        """test a batch size below one is rejected"""
+        with self.assertRaisesMessage(CommandError, "--batch-size"):
+            call_command("provision_users", self._write(""), batch_size=0)
+
+    def test_provision_skips_failed_rows(self):
+        """test invalid rows and taken emails are reported and skipped"""
+        get_user_model().objects.create_user("taken@test.com", "pass1!")
+        rows = [
+            {"email": "new@test.com", "name": "New", "password": "secret"},
+            {"email": "taken@test.com", "name": "Taken", "password": "secret"},
+            {"email": "invalid", "name": "Invalid", "password": "secret"},
+        ]
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            "provision_users",
+            self._write("\n".join(json.dumps(row) for row in rows)),
+            stdout=out,
+            stderr=err,
+        )
+
+        self.assertIn("Created 1 users, skipped 2 rows", out.getvalue())
+        self.assertIn("Skipping line 2: email: A user with this", err.getvalue())
+        self.assertIn("Skipping line 3: email:", err.getvalue())
+        self.assertTrue(get_user_model().objects.filter(email="new@test.com").exists())
 
-            self.assertEqual(getitem.call_count, 6)
+    # Helpers
+    def _write(self, content, suffix=".ndjson"):
+        file, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(file, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
@@ -0,0 +1,116 @@
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.test import TestCase, override_settings
+
+from core.hashers import HasherPool, HasherPoolFull
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+PASSWORD = "testpass123"
+
+
+class PasswordHashingTest(TestCase):
+    """Test hashing passwords with the configured profile"""
+
+    def test_outdated_cost_upgraded_on_login(self):
+        """Test a hash with fewer iterations than configured is upgraded on login"""
+        user = self._create_user(
+            hashers.PBKDF2PasswordHasher().encode(PASSWORD, "salt", iterations=1000)
+        )
+
+        self.assertTrue(user.check_password(PASSWORD))
+
+        user.refresh_from_db()
+        iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+        self.assertTrue(user.password.startswith(f"pbkdf2_sha256${iterations}$"))
+        self.assertTrue(user.check_password(PASSWORD))
+
+    def test_wrong_password_not_upgraded(self):
+        """Test an outdated hash is kept when the password is wrong"""
+        encoded = hashers.PBKDF2PasswordHasher().encode(PASSWORD, "salt", 1000)
+        user = self._create_user(encoded)
+
+        self.assertFalse(user.check_password("wrongpass"))
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+    @skipUnless(argon2, "requires argon2-cffi")
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "core.hashers.Argon2PasswordHasher",
+            "core.hashers.PBKDF2PasswordHasher",
+        ],
+    )
+    def test_hash_upgraded_to_profile_on_login(self):
+        """Test a hash of another profile is replaced by the profile's on login"""
+        user = self._create_user(
+            hashers.make_password(PASSWORD, hasher="pbkdf2_sha256")
+        )
+
+        self.assertTrue(user.check_password(PASSWORD))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("argon2$"))
+
+    # Helpers
+    def _create_user(self, encoded: str):
+        user = get_user_model().objects.create_user("test@test.com")
+        user.password = encoded
+        user.save()
+        return user
+
+
+class HasherPoolTest(TestCase):
+    """Test the bounded pool hashing passwords"""
+
+    def test_full_pool_rejects_hashes(self):
+        """Test hashes beyond the workers and queue are rejected"""
+        pool = HasherPool(workers=1, queue_size=0)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        blocked = threading.Thread(target=pool.run, args=(block,))
+        blocked.start()
+        started.wait()
+        try:
+            with self.assertRaises(HasherPoolFull):
+                pool.run(hashers.make_password, PASSWORD)
+        finally:
+            release.set()
+            blocked.join()
+
+        self.assertTrue(
+            hashers.check_password(PASSWORD, pool.run(hashers.make_password, PASSWORD))
+        )
+
+    def test_map_runs_up_to_workers_at_once(self):
+        """Test hashes of a batch run together, no more than the workers"""
+        pool = HasherPool(workers=2, queue_size=0)
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def hash_password(password):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            encoded = hashers.make_password(password)
+            with lock:
+                running[0] -= 1
+            return encoded
+
+        passwords = [f"{PASSWORD}{number}" for number in range(5)]
+        hashes = pool.map(hash_password, passwords)
+
+        self.assertLessEqual(peak[0], 2)
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(hashers.check_password(password, encoded))
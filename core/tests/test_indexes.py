@@ -0,0 +1,95 @@
+import os
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core import models
+
+
+ROWS_PER_TABLE = 100_000
+USERS = 10
+
+
+@skipUnless(os.getenv("RUN_SLOW_TESTS") == "1", "seeds 300k rows, set RUN_SLOW_TESTS=1")
+class ListingIndexTests(TestCase):
+    """Test per-user listing queries are served in order from an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{i}@test.com") for i in range(USERS)
+        )
+        if users[0].pk is None:
+            users = list(get_user_model().objects.order_by("id"))
+        cls.user = users[0]
+        rows_per_user = ROWS_PER_TABLE // USERS
+
+        for model in (models.Tag, models.Ingredient):
+            model.objects.bulk_create(
+                (
+                    model(user=user, name=f"{model.__name__} {i}")
+                    for user in users
+                    for i in range(rows_per_user)
+                ),
+                batch_size=5000,
+            )
+        models.Recipe.objects.bulk_create(
+            (
+                models.Recipe(user=user, title=f"Recipe {i}", time_minutes=5, price=1)
+                for user in users
+                for i in range(rows_per_user)
+            ),
+            batch_size=5000,
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_tag_listing_uses_index(self):
+        """Test listing tags by name does not sort"""
+        queryset = models.Tag.objects.filter(user=self.user).order_by("-name")
+
+        self._assert_ordered_by_index(queryset, "core_tag_user_name_idx")
+
+    def test_ingredient_listing_uses_index(self):
+        """Test listing ingredients by name does not sort"""
+        queryset = models.Ingredient.objects.filter(user=self.user).order_by("-name")
+
+        self._assert_ordered_by_index(queryset, "core_ingredient_user_name_idx")
+
+    def test_recipe_listing_uses_index(self):
+        """Test listing recipes by id does not sort"""
+        queryset = models.Recipe.objects.filter(user=self.user).order_by("-id")
+
+        self._assert_ordered_by_index(queryset, "core_recipe_user_id_idx")
+
+    # Assertion helpers
+    def _assert_ordered_by_index(self, queryset, index_name):
+        # slice like a page of the paginated API would
+        plan = queryset[:100].explain()
+
+        self.assertIn(index_name, plan)
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Sort", plan)
+        elif connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class UserEmailIndexTests(TestCase):
+    """Test users are looked up by email in any case from an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{i}@test.com") for i in range(1000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_email_lookup_uses_index(self):
+        """Test a login lookup does not scan the users"""
+        plan = get_user_model().objects.filter_email("User1@Test.com").explain()
+
+        self.assertIn("core_user_email_lower_uniq", plan)
@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -64,3 +65,31 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(recipe), recipe.title)
+
+    def test_user_lookup_ignores_email_case(self):
+        """Test users are found by email in any case"""
+        user = sample_user("test@test.com")
+
+        self.assertEqual(
+            get_user_model().objects.get_by_natural_key("Test@TEST.com"), user
+        )
+        self.assertEqual(
+            list(get_user_model().objects.filter_email("TEST@test.com", "x@test.com")),
+            [user],
+        )
+
+    def test_user_email_unique_in_any_case(self):
+        """Test two users cannot share an email that only differs by case"""
+        sample_user("test@test.com")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            get_user_model().objects.create(email="Test@test.com")
+
+    def test_user_clean_lowercases_email(self):
+        """Test validating a user, like admin forms do, lowercases its email"""
+        user = get_user_model()(email="New@Test.com", name="New")
+        user.set_unusable_password()
+
+        user.full_clean()
+
+        self.assertEqual(user.email, "new@test.com")
@@ -0,0 +1,75 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Recipe
+from core.tests.utils import APIClient
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+METRICS_URL = reverse("metrics")
+
+
+class PerformanceMiddlewareTest(TestCase):
+    """Test measuring requests"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(user=self.user, title="Soup", time_minutes=5, price=2)
+
+    def test_server_timing_header(self):
+        """Test responses tell the time spent in the database and serializers"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPES_URL)
+
+        timings = response["Server-Timing"]
+        self.assertIn("total;dur=", timings)
+        self.assertIn(f'desc="{len(queries)} queries"', timings)
+        self.assertIn("serializer;dur=", timings)
+
+    def test_structured_log_line(self):
+        """Test each request is logged as a JSON line"""
+        with self.assertLogs("core.performance", "INFO") as logs:
+            response = self.client.get(RECIPES_URL)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "recipe:recipe-list")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["response_bytes"], len(response.content))
+        self.assertGreater(line["serializer_ms"], 0)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_histograms(self):
+        """Test /metrics exposes request histograms per endpoint"""
+        self.client.get(RECIPES_URL)
+
+        response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer scraper")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        labels = 'view="recipe:recipe-list",method="GET"'
+        self.assertIn(
+            f'recipebook_request_duration_seconds_bucket{{{labels},le="+Inf"}}', body
+        )
+        self.assertIn(f"recipebook_request_db_queries_count{{{labels}}}", body)
+        self.assertIn("recipebook_token_cache_hits_total ", body)
+
+    @override_settings(METRICS_TOKEN="scraper")
+    def test_metrics_require_token(self):
+        """Test /metrics rejects scrapers without the metrics token"""
+        for headers in ({}, {"HTTP_AUTHORIZATION": "Bearer other"}):
+            response = self.client.get(METRICS_URL, **headers)
+
+            self.assertEqual(response.status_code, 401)
+
+    def test_metrics_off_without_token(self):
+        """Test /metrics is not served when no metrics token is set"""
+        response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer ")
+
+        self.assertEqual(response.status_code, 404)
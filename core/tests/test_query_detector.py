@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe, Tag
+from core.tests.utils import RepeatedQueryDetector, query_template
+from recipe.serializers import RecipeSerializer
+
+
+class QueryTemplateTest(SimpleTestCase):
+    """Test reducing queries to templates"""
+
+    def test_literals_replaced(self):
+        """Test numbers, strings and parameter lists become placeholders"""
+        self.assertEqual(
+            query_template(
+                "SELECT * FROM tag WHERE id IN (%s, %s, 3) AND name = 'it''s' LIMIT 21"
+            ),
+            "SELECT * FROM tag WHERE id IN (?) AND name = ? LIMIT ?",
+        )
+
+
+class RepeatedQueryDetectorTest(TestCase):
+    """Test detecting N+1 queries"""
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        tag = Tag.objects.create(user=user, name="Vegan")
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=user, title=f"Soup {i}", time_minutes=5, price=2
+            )
+            recipe.tags.add(tag)
+
+    def test_repeated_query_fails(self):
+        """Test loading relations once per object fails with the offending stack"""
+        with self.assertRaises(AssertionError) as error:
+            with RepeatedQueryDetector(max_repeats=2, label="serializing"):
+                RecipeSerializer(Recipe.objects.all(), many=True).data
+
+        message = str(error.exception)
+        self.assertIn("Query repeated 3 times in serializing", message)
+        self.assertIn("core_recipe_tags", message)
+        self.assertIn(__file__, message)
+
+    def test_prefetched_relations_pass(self):
+        """Test prefetching relations keeps queries below the limit"""
+        recipes = Recipe.objects.prefetch_related("tags", "ingredients")
+
+        with RepeatedQueryDetector(max_repeats=2):
+            RecipeSerializer(recipes, many=True).data
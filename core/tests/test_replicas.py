@@ -0,0 +1,187 @@
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe
+from core.replicas import ReplicaMiddleware
+from core.tests.utils import APIClient
+from recipe.cache import bump_user_version, replica_may_lag
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1"], REPLICA_STICKY_SECONDS=5, CACHE_SHARED=True
+)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Test routing reads of safe requests to replicas"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(self._read_database)
+
+    def test_reads_outside_requests_use_default(self):
+        """Test reads outside of a request use the primary"""
+        self.assertEqual(router.db_for_read(Recipe), "default")
+
+    def test_safe_requests_read_replica(self):
+        """Test reads of safe requests use a replica, writes the primary"""
+        response = self.middleware(self.factory.get("/"))
+
+        self.assertEqual(response.content, b"replica1")
+        self.assertEqual(router.db_for_write(Recipe), "default")
+
+    async def test_async_requests_read_replica(self):
+        """Test a sync view behind the async middleware reads a replica"""
+        middleware = ReplicaMiddleware(sync_to_async(self._read_database))
+
+        response = await middleware(self.factory.get("/"))
+
+        self.assertEqual(response.content, b"replica1")
+
+    @override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+    def test_one_replica_per_request(self):
+        """Test every read of a request goes to the same replica"""
+        middleware = ReplicaMiddleware(
+            lambda request: HttpResponse(
+                " ".join({router.db_for_read(Recipe) for _ in range(20)})
+            )
+        )
+
+        response = middleware(self.factory.get("/"))
+
+        self.assertIn(response.content, (b"replica1", b"replica2"))
+
+    def test_credentials_read_from_default(self):
+        """Test tokens, sessions and users are always read from the primary"""
+        middleware = ReplicaMiddleware(
+            lambda request: HttpResponse(
+                router.db_for_read(Token)
+                + router.db_for_read(Session)
+                + router.db_for_read(get_user_model())
+            )
+        )
+
+        response = middleware(self.factory.get("/"))
+
+        self.assertEqual(response.content, b"defaultdefaultdefault")
+
+    def test_writes_read_from_default(self):
+        """Test reads of unsafe requests use the primary"""
+        response = self.middleware(self.factory.post("/"))
+
+        self.assertEqual(response.content, b"default")
+
+    def test_reads_stick_to_default_after_write(self):
+        """Test a user reads from the primary for a while after a write"""
+        bump_user_version(1)
+
+        own = self.middleware(self._user_request(1))
+        other = self.middleware(self._user_request(2))
+
+        self.assertEqual(own.content, b"default")
+        self.assertEqual(other.content, b"replica1")
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_expires(self):
+        """Test a user reads from replicas again once the window is over"""
+        bump_user_version(1)
+
+        response = self.middleware(self._user_request(1))
+
+        self.assertEqual(response.content, b"replica1")
+
+    def test_lazy_user_not_loaded(self):
+        """Test a user not authenticated by the view yet is not loaded"""
+        request = self.factory.get("/")
+        request.user = SimpleLazyObject(lambda: self.fail("user loaded"))
+
+        response = self.middleware(request)
+
+        self.assertEqual(response.content, b"replica1")
+
+    @override_settings(CACHE_SHARED=False)
+    def test_default_without_shared_cache(self):
+        """Test replicas are not read when writes are not seen by every worker"""
+        response = self.middleware(self._user_request(1))
+
+        self.assertEqual(response.content, b"default")
+
+    def test_lagging_replica_detected(self):
+        """Test reads from a replica are flagged once the user wrote meanwhile"""
+
+        def view(request):
+            router.db_for_read(Recipe)
+            lagging = replica_may_lag(Recipe, 1)
+            bump_user_version(1)
+            return HttpResponse(f"{lagging} {replica_may_lag(Recipe, 1)}")
+
+        response = ReplicaMiddleware(view)(self._user_request(1))
+
+        self.assertEqual(response.content, b"False True")
+
+    # Helpers
+    def _read_database(self, request):
+        return HttpResponse(router.db_for_read(Recipe))
+
+    def _user_request(self, user_id):
+        request = self.factory.get("/")
+        # like a view that authenticated the request
+        request.user = get_user_model()(pk=user_id)
+        return request
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "requires DB_REPLICA_HOSTS")
+@override_settings(CACHE_SHARED=True)
+class ReplicaApiTest(TransactionTestCase):
+    """Test the API against a configured replica"""
+
+    databases = "__all__"
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+
+    def test_created_recipe_read_back(self):
+        """Test a created recipe is read from the primary right after"""
+        payload = {"title": "Pancakes", "time_minutes": 10, "price": "5.00"}
+        recipe_id = self.client.post(reverse("recipe:recipe-list"), payload).data["id"]
+
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as queries:
+            response = self.client.get(
+                reverse("recipe:recipe-detail", args=[recipe_id])
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    # creating the user counts as its latest write
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_reads_served_by_replica(self):
+        """Test lists of a user that did not write lately are read from a replica"""
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as queries:
+            response = self.client.get(reverse("recipe:recipe-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(queries), 0)
@@ -0,0 +1,93 @@
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client as DjangoClient
+from rest_framework.test import APIClient as RestFrameworkAPIClient
+
+
+MAX_REPEATED_QUERIES = 5
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_LISTS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+
+
+def query_template(sql: str) -> str:
+    """Return a query with its literals and parameters replaced by placeholders"""
+    return _LISTS.sub("(?)", _LITERALS.sub("?", sql))
+
+
+def _project_stack() -> str:
+    """Return the stack of the running query restricted to project files"""
+    root = str(Path(settings.BASE_DIR).resolve())
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(root) and "site-packages" not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames))
+
+
+class RepeatedQueryDetector:
+    """Fail when a query template runs more than a limit, the N+1 query pattern"""
+
+    def __init__(self, max_repeats: int = MAX_REPEATED_QUERIES, label: str = ""):
+        self.max_repeats = max_repeats
+        self.label = label
+        self.counts = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        template = query_template(sql)
+        self.counts[template] += 1
+        if self.counts[template] == self.max_repeats + 1:
+            self.stacks[template] = _project_stack()
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        if exc_type is None and self.stacks:
+            raise AssertionError(self.report())
+
+    def report(self) -> str:
+        """Describe the repeated queries and where they were run from"""
+        lines = []
+        for template, stack in self.stacks.items():
+            lines.append(
+                f"Query repeated {self.counts[template]} times in {self.label} "
+                f"(at most {self.max_repeats} allowed):\n  {template}\n{stack}"
+            )
+        return "\n".join(lines)
+
+
+class RepeatedQueryClientMixin:
+    """Test client failing requests that run a query more than max_repeats times"""
+
+    # None lets a test run requests repeating queries on purpose
+    max_repeats = MAX_REPEATED_QUERIES
+
+    def request(self, **request):
+        if self.max_repeats is None:
+            return super().request(**request)
+
+        label = f"{request.get('REQUEST_METHOD', 'GET')} {request.get('PATH_INFO')}"
+        with RepeatedQueryDetector(self.max_repeats, label):
+            return super().request(**request)
+
+
+class APIClient(RepeatedQueryClientMixin, RestFrameworkAPIClient):
+    """DRF test client detecting N+1 queries"""
+
+
+class Client(RepeatedQueryClientMixin, DjangoClient):
+    """Django test client detecting N+1 queries"""
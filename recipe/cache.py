@@ -0,0 +1,172 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+
+def _version_key(user_id: int) -> str:
+    return f"recipe:version:{user_id}"
+
+
+def _modified_key(user_id: int) -> str:
+    return f"recipe:modified:{user_id}"
+
+
+def _names_version_key(user_id: int) -> str:
+    return f"recipe:names:{user_id}"
+
+
+def _get_version(key: str) -> int:
+    version = cache.get(key)
+
+    if version is None:
+        # start from the clock so a version lost to eviction never matches old entries
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump_version(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        _get_version(key)
+
+
+def get_user_version(user_id: int) -> int:
+    """Return the current version of a user's recipe data"""
+    return _get_version(_version_key(user_id))
+
+
+def get_names_version(user_id: int) -> int:
+    """Return the current version of the names of a user's tags and ingredients"""
+    return _get_version(_names_version_key(user_id))
+
+
+def bump_user_version(user_id: int, names: bool = False) -> None:
+    """Invalidate every cached response built from a user's recipe data
+
+    The version of tag and ingredient names is only bumped along with names=True.
+    """
+    _bump_version(_version_key(user_id))
+    if names:
+        _bump_version(_names_version_key(user_id))
+
+    cache.set(_modified_key(user_id), int(time.time()), timeout=None)
+
+
+def get_user_last_modified(user_id: int):
+    """Return the timestamp of the last change to a user's recipe data, if known"""
+    return cache.get(_modified_key(user_id))
+
+
+def modified_within(user_id: int, seconds: float) -> bool:
+    """Return whether a user's recipe data changed in the last seconds"""
+    modified = get_user_last_modified(user_id)
+    return modified is not None and time.time() - modified < seconds
+
+
+def replica_may_lag(model, user_id: int) -> bool:
+    """Return whether a user's objects are read from a replica behind a recent write
+
+    Responses read from such a replica may miss the write, they are neither
+    cached nor given validators.
+    """
+    if router.db_for_read(model) == "default":
+        return False
+
+    return modified_within(user_id, settings.REPLICA_STICKY_SECONDS)
+
+
+def invalidate_user(user_id: int, names: bool = False) -> None:
+    """Bump the user version now and again once the current transaction commits"""
+    bump_user_version(user_id, names)
+    # a read racing the transaction could have cached the old data in between
+    transaction.on_commit(lambda: bump_user_version(user_id, names))
+
+
+def list_cache_key(request) -> str:
+    """Return the cache key of a list response for the request's user and url"""
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    user_id = request.user.pk
+    return f"recipe:list:{user_id}:{get_user_version(user_id)}:{url}"
+
+
+def response_etag(request) -> str:
+    """Return the ETag of a response for the request's user, url and media type"""
+    user_id = request.user.pk
+    value = ":".join(
+        (
+            str(user_id),
+            str(get_user_version(user_id)),
+            request.get_full_path(),
+            request.accepted_media_type,
+        )
+    )
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+class CachedListMixin:
+    """Serve list responses from a per-user cache invalidated on data changes
+
+    Versions bumped by one worker must be seen by the others, lists are only
+    cached when the cache is shared.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.CACHE_SHARED:
+            return super().list(request, *args, **kwargs)
+
+        key = list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if not replica_may_lag(self.queryset.model, request.user.pk):
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve with 304 Not Modified while user data is unchanged
+
+    Responses are validated by their ETag alone. A Last-Modified date only has
+    whole seconds, a write in the same second as a read would be missed.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        # like cached lists, validators are only trusted from a shared cache
+        if not settings.CACHE_SHARED:
+            return handler(request, *args, **kwargs)
+
+        # the ETag is computed before the handler runs, so a concurrent write
+        # can only make it older than the payload, never newer
+        etag = response_etag(request)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        # the payload of a lagging replica may be older than the validators
+        if response.status_code == 200 and replica_may_lag(
+            self.queryset.model, request.user.pk
+        ):
+            return response
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+
+        return response
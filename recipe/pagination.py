@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework import pagination
+
+
+class BaseCursorPagination(pagination.CursorPagination):
+    """Keyset pagination with a client selectable, capped page size"""
+
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        # the default and the cap are read from the settings on each request
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+        return super().get_page_size(request)
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes from the most recently created"""
+
+    ordering = "-id"
+
+
+class RecipeAttributeCursorPagination(BaseCursorPagination):
+    """Paginate recipe attributes like tags and ingredients by name"""
+
+    ordering = "-name"
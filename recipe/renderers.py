@@ -0,0 +1,62 @@
+import csv
+import json
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class _Echo:
+    """File-like object handing back what the csv writer writes"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Render rows as newline delimited JSON"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(self.stream(rows))
+
+    def stream(self, rows):
+        """Yield each row as an encoded line"""
+        for row in rows:
+            yield (json.dumps(row, cls=JSONEncoder) + "\n").encode()
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """Render flat rows as CSV, list values are joined with a pipe"""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+    list_separator = "|"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(self.stream(rows))
+
+    def stream(self, rows, header=None):
+        """Yield an encoded header line followed by one line per row
+
+        Without an explicit header, the keys of the first row are used.
+        """
+        writer = csv.writer(_Echo())
+        if header is not None:
+            yield writer.writerow(header).encode()
+
+        for row in rows:
+            if header is None:
+                header = list(row)
+                yield writer.writerow(header).encode()
+            yield writer.writerow([self._cell(row.get(key)) for key in header]).encode()
+
+    def _cell(self, value):
+        if isinstance(value, list):
+            return self.list_separator.join(str(item) for item in value)
+        return value
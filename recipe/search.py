@@ -0,0 +1,71 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+
+from core.models import Ingredient, Recipe, Tag
+
+
+SEARCH_CONFIG = "english"
+
+
+def _names(model):
+    """Return a subquery of the names of a recipe's tags or ingredients"""
+    names = (
+        model.objects.filter(recipe=OuterRef("pk"))
+        .values("recipe")
+        .annotate(names=StringAgg("name", " "))
+        .values("names")
+    )
+    return Subquery(names)
+
+
+def search_document():
+    """Return the search vector of a recipe, titles rank above relation names"""
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(_names(Tag), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_names(Ingredient), weight="B", config=SEARCH_CONFIG)
+    )
+
+
+def search_enabled() -> bool:
+    """Return whether the search vector column is maintained by the database"""
+    return connection.vendor == "postgresql"
+
+
+def update_search_vectors(recipe_ids) -> None:
+    """Recompute the search vector of recipes from an id list or a values queryset"""
+    if not search_enabled():
+        return
+
+    recipes = Recipe.objects.filter(id__in=recipe_ids)
+    recipes.update(search_vector=search_document())
+
+
+def search_recipes(queryset, text: str):
+    """Return the recipes of a queryset matching a text, best matches first
+
+    Without postgres full-text search, recipes containing every word in their
+    title or in the name of a tag or ingredient are returned, title matches first.
+    """
+    if search_enabled():
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-id")
+        )
+
+    for word in text.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word)
+            | Q(id__in=Tag.objects.filter(name__icontains=word).values("recipe"))
+            | Q(id__in=Ingredient.objects.filter(name__icontains=word).values("recipe"))
+        )
+    title_match = Q()
+    for word in text.split():
+        title_match &= Q(title__icontains=word)
+    return queryset.annotate(
+        rank=Case(When(title_match, then=Value(1.0)), default=Value(0.0))
+    ).order_by("-rank", "-id")
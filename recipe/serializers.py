@@ -1,8 +1,183 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import connection
+from django.db.models import OuterRef, Subquery, prefetch_related_objects
 from rest_framework import serializers
 from core.models import Ingredient, Recipe, Tag
+from core.performance import TimedSerializerMixin
+from recipe.search import update_search_vectors
 
 
-class TagSerializer(serializers.ModelSerializer):
+BULK_BATCH_SIZE = 500
+
+RECIPE_ROW_FIELDS = ("id", "title", "time_minutes", "price", "link")
+RECIPE_ROW_RELATIONS = ("ingredients", "tags")
+
+
+def bulk_item_id(item):
+    """Return the id of the recipe an item of a bulk update refers to, if valid"""
+    value = item.get("id") if isinstance(item, dict) else None
+    try:
+        return serializers.IntegerField().to_internal_value(value)
+    except serializers.ValidationError:
+        return None
+
+
+def _related_pk(value) -> int:
+    """Return a related primary key sent by a client as an integer
+
+    Raise TypeError or ValueError for booleans and fractional numbers, which
+    int() would turn into another primary key.
+    """
+    if isinstance(value, bool):
+        raise TypeError("booleans are not primary keys")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError("fractional numbers are not primary keys")
+    return int(value)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field resolving objects preloaded by a bulk serializer"""
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded_relations", {}).get(self.queryset.model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+
+        try:
+            return preloaded[_related_pk(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class BulkCreateListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """List serializer saving every item with batched inserts"""
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+
+class BulkRecipeListSerializer(BulkCreateListSerializer):
+    """List serializer bulk saving recipes along with their tags and ingredients
+
+    When updating, the instance is a mapping of recipe id to recipe and every
+    item must carry the id of the recipe it updates.
+    """
+
+    relations = ("ingredients", "tags")
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._preload_relations(data)
+        # index of the item updating each recipe, a recipe is updated only once
+        self._items_by_id = {}
+        self._item = -1
+
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        self._item += 1
+        recipe = self.instance.get(bulk_item_id(data))
+        if recipe is None:
+            raise serializers.ValidationError({"id": ["Recipe not found."]})
+
+        first = self._items_by_id.setdefault(recipe.id, self._item)
+        if first != self._item:
+            raise serializers.ValidationError(
+                {"id": [f"Recipe already updated by item {first}."]}
+            )
+
+        attrs = super().run_child_validation(data)
+        attrs["id"] = recipe.id
+        return attrs
+
+    def create(self, validated_data):
+        relations = [
+            {name: attrs.pop(name, []) for name in self.relations}
+            for attrs in validated_data
+        ]
+        recipes = super().create(validated_data)
+        self._save_relations(recipes, relations, replace=False)
+
+        return recipes
+
+    def update(self, instance, validated_data):
+        relations = [
+            {name: attrs.pop(name) for name in self.relations if name in attrs}
+            for attrs in validated_data
+        ]
+        recipes = []
+        fields = set()
+        for attrs in validated_data:
+            recipe = instance[attrs.pop("id")]
+            for attr, value in attrs.items():
+                setattr(recipe, attr, value)
+            fields.update(attrs)
+            recipes.append(recipe)
+
+        if fields:
+            Recipe.objects.bulk_update(recipes, fields, batch_size=BULK_BATCH_SIZE)
+        self._save_relations(recipes, relations, replace=True)
+
+        return recipes
+
+    def _preload_relations(self, data):
+        """Load the related objects referenced by all items, one query per relation"""
+        preloaded = {}
+        for name in self.relations:
+            ids = set()
+            for item in data:
+                values = item.get(name) if isinstance(item, dict) else None
+                for value in values if isinstance(values, list) else ():
+                    try:
+                        ids.add(_related_pk(value))
+                    except (TypeError, ValueError):
+                        pass
+
+            queryset = self.child.fields[name].child_relation.get_queryset()
+            preloaded[queryset.model] = queryset.in_bulk(ids)
+
+        self.context["preloaded_relations"] = preloaded
+
+    def _save_relations(self, recipes, relations, replace: bool):
+        """Save the given relations of recipes with batched m2m inserts"""
+        for name in self.relations:
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            if replace:
+                replaced = [
+                    recipe.id
+                    for recipe, values in zip(recipes, relations)
+                    if name in values
+                ]
+                through.objects.filter(**{f"{source}__in": replaced}).delete()
+
+            through.objects.bulk_create(
+                [
+                    through(**{source: recipe.id, target: obj.pk})
+                    for recipe, values in zip(recipes, relations)
+                    # dict.fromkeys drops duplicates and keeps the order
+                    for obj in dict.fromkeys(values.get(name, ()))
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+
+        # bulk inserts and updates do not send the signals refreshing search vectors
+        update_search_vectors([recipe.id for recipe in recipes])
+        prefetch_related_objects(recipes, *self.relations)
+
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the Tag object"""
 
     class Meta:
@@ -12,9 +187,10 @@ class TagSerializer(serializers.ModelSerializer):
             "name",
         )
         read_only_fields = ("id",)
+        list_serializer_class = BulkCreateListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the Ingredient object"""
 
     class Meta:
@@ -24,17 +200,18 @@ class IngredientSerializer(serializers.ModelSerializer):
             "name",
         )
         read_only_fields = ("id",)
+        list_serializer_class = BulkCreateListSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the Recipe object"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = PreloadedPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all(),
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = PreloadedPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all(),
     )
@@ -51,6 +228,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "link",
         )
         read_only_fields = ("id",)
+        list_serializer_class = BulkRecipeListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -65,3 +243,91 @@ class RecipeDetailSerializer(RecipeSerializer):
         many=True,
         read_only=True,
     )
+
+
+def _relation_ids_key(name: str) -> str:
+    """Return the row key holding the ids of a recipe relation, like tag_ids"""
+    return f"{Recipe._meta.get_field(name).m2m_reverse_field_name()}_ids"
+
+
+def _relation_ids(name: str):
+    """Return a subquery of the ordered ids related to a recipe through a m2m"""
+    field = Recipe._meta.get_field(name)
+    source = field.m2m_field_name()
+    target = f"{field.m2m_reverse_field_name()}_id"
+    ids = (
+        field.remote_field.through.objects.filter(**{source: OuterRef("pk")})
+        .values(source)
+        .annotate(ids=ArrayAgg(target, ordering=target))
+        .values("ids")
+    )
+    return Subquery(ids)
+
+
+def _load_relation_ids(rows):
+    """Set the ordered related ids of recipe rows, one query per relation"""
+    for name in RECIPE_ROW_RELATIONS:
+        field = Recipe._meta.get_field(name)
+        source = f"{field.m2m_field_name()}_id"
+        target = f"{field.m2m_reverse_field_name()}_id"
+        key = _relation_ids_key(name)
+        ids = {row["id"]: [] for row in rows}
+        for row in rows:
+            row[key] = ids[row["id"]]
+
+        through = field.remote_field.through.objects.filter(**{f"{source}__in": ids})
+        for recipe_id, pk in through.order_by(target).values_list(source, target):
+            ids[recipe_id].append(pk)
+
+
+def recipe_rows(queryset):
+    """Return recipes as the value rows read by RecipeRowSerializer
+
+    Postgres aggregates the ids of tags and ingredients into arrays in the same
+    query, other databases leave them to the list serializer, one page at a time.
+    """
+    rows = queryset.values(*RECIPE_ROW_FIELDS)
+    if connection.vendor != "postgresql":
+        return rows
+
+    return rows.annotate(
+        **{
+            _relation_ids_key(name): _relation_ids(name)
+            for name in RECIPE_ROW_RELATIONS
+        }
+    )
+
+
+class RecipeRowListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """List serializer completing recipe rows with the ids not aggregated"""
+
+    def to_representation(self, data):
+        rows = list(data)
+        if rows and _relation_ids_key("tags") not in rows[0]:
+            _load_relation_ids(rows)
+
+        return super().to_representation(rows)
+
+
+class RecipeRowSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """Read only serializer of recipe rows, rendering the same as RecipeSerializer
+
+    Building the payload from plain values skips the model instances and the
+    per field serialization of RecipeSerializer, which dominates list responses.
+    """
+
+    class Meta:
+        list_serializer_class = RecipeRowListSerializer
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "time_minutes": row["time_minutes"],
+            # an aggregate over no rows is NULL
+            "ingredients": row["ingredient_ids"] or [],
+            # decimals come from the database quantized to their decimal places
+            "price": f"{row['price']:f}",
+            "tags": row["tag_ids"] or [],
+            "link": row["link"],
+        }
@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import invalidate_user
+from recipe.search import update_search_vectors
+
+
+# owners whose recipe objects are deleted by a surrounding deleting() block
+_deleting_owners = ContextVar("deleting_owners", default=frozenset())
+
+
+@contextmanager
+def deleting(queryset):
+    """Reindex and invalidate once for everything deleted in the block
+
+    Deleting a queryset of users, recipes, tags or ingredients cascades to
+    rows that would each be reindexed and invalidated by the receivers below.
+    Their owners and the recipes left without a deleted tag or ingredient are
+    looked up once instead, recipes deleted along with them are not reindexed.
+    """
+    User = get_user_model()
+    with transaction.atomic(using=queryset.db):
+        if queryset.model is User:
+            owners = set(queryset.values_list("pk", flat=True))
+        else:
+            owners = set(queryset.values_list("user_id", flat=True).distinct())
+
+        recipe_ids = set()
+        for model, relation in ((Tag, Recipe.tags), (Ingredient, Recipe.ingredients)):
+            through = relation.through.objects
+            field = model._meta.model_name
+            if queryset.model is User:
+                links = through.filter(**{f"{field}__user__in": owners}).exclude(
+                    recipe__user__in=owners
+                )
+            elif queryset.model is model:
+                links = through.filter(**{f"{field}__in": queryset})
+            else:
+                continue
+            recipe_ids.update(links.values_list("recipe_id", flat=True))
+
+        token = _deleting_owners.set(_deleting_owners.get() | owners)
+        try:
+            yield
+        finally:
+            _deleting_owners.reset(token)
+
+        update_search_vectors(recipe_ids)
+        for owner in owners:
+            invalidate_user(owner, names=True)
+
+
+def _deleted_with_owner(instance, signal) -> bool:
+    """Return whether a deleted object is handled by a deleting() block"""
+    return signal is not post_save and instance.user_id in _deleting_owners.get()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner(sender, instance, signal, **kwargs):
+    """Invalidate cached responses of the owner of a changed recipe object"""
+    if _deleted_with_owner(instance, signal):
+        return
+
+    invalidate_user(instance.user_id, names=sender is not Recipe)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations(sender, instance, action, **kwargs):
+    """Invalidate cached responses when tags or ingredients of recipes change"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user(sender, instance, created, **kwargs):
+    """Start new users from a fresh version, their id may have been used before"""
+    if created:
+        invalidate_user(instance.pk, names=True)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    """Refresh the search vector of a saved recipe"""
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipe_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh the search vector of recipes whose tags or ingredients changed"""
+    if reverse and action == "pre_clear":
+        # the recipes losing the tag or ingredient are unknown once cleared
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list("id", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        update_search_vectors(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        update_search_vectors(
+            instance._cleared_recipe_ids if reverse else [instance.pk]
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_indexed_recipes(sender, instance, signal, **kwargs):
+    """Remember the recipes of a deleted tag or ingredient before the cascade"""
+    if _deleted_with_owner(instance, signal):
+        return
+
+    instance._recipe_ids = list(instance.recipe_set.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_attribute_recipes(sender, instance, signal, created=False, **kwargs):
+    """Refresh the search vector of recipes using a renamed or deleted attribute"""
+    if created or _deleted_with_owner(instance, signal):
+        return
+
+    recipe_ids = getattr(instance, "_recipe_ids", None)
+    if recipe_ids is None:
+        recipe_ids = instance.recipe_set.values_list("id", flat=True)
+    update_search_vectors(recipe_ids)
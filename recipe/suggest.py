@@ -0,0 +1,92 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.functions import Lower
+
+from recipe.cache import get_names_version
+
+
+class PrefixIndex:
+    """Names sorted case insensitively, searchable by prefix with a bisection"""
+
+    def __init__(self, rows):
+        entries = sorted((name.casefold(), name, pk) for pk, name in rows)
+        # names already in their case folded form are only stored once
+        self.keys = [name if key == name else key for key, name, _ in entries]
+        self.entries = [(pk, name) for _, name, pk in entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, prefix: str, limit: int):
+        """Return the first entries whose name starts with a prefix"""
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        matches = []
+        for position in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[position].startswith(prefix):
+                break
+            pk, name = self.entries[position]
+            matches.append({"id": pk, "name": name})
+
+        return matches
+
+
+_indexes = OrderedDict()
+_cached_entries = 0
+_lock = threading.Lock()
+
+
+def get_prefix_index(queryset, user_id: int) -> PrefixIndex:
+    """Return the prefix index of a user's tags or ingredients
+
+    Indexes of the most recently used users are kept in process, up to
+    SUGGEST_CACHE_ENTRIES names in all, and rebuilt once the version of the
+    user's names changes, like when a new name is created.
+    """
+    global _cached_entries
+
+    key = (queryset.model._meta.label, user_id)
+    version = get_names_version(user_id)
+
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            _indexes.move_to_end(key)
+            return cached[1]
+
+    index = PrefixIndex(queryset.filter(user_id=user_id).values_list("id", "name"))
+    if len(index) > settings.SUGGEST_CACHE_ENTRIES:
+        return index
+
+    with _lock:
+        replaced = _indexes.pop(key, None)
+        if replaced is not None:
+            _cached_entries -= len(replaced[1])
+        _indexes[key] = (version, index)
+        _cached_entries += len(index)
+        while _cached_entries > settings.SUGGEST_CACHE_ENTRIES:
+            _, (_, evicted) = _indexes.popitem(last=False)
+            _cached_entries -= len(evicted)
+
+    return index
+
+
+def suggest_names(queryset, user_id: int, prefix: str, limit: int):
+    """Return the first tags or ingredients of a user starting with a prefix
+
+    Without a cache shared by every worker the version of the names is
+    unreliable, the database is queried through the index of lower case
+    names instead of keeping an index in process.
+    """
+    if settings.CACHE_SHARED:
+        return get_prefix_index(queryset, user_id).match(prefix, limit)
+
+    return list(
+        queryset.annotate(name_lower=Lower("name"))
+        .filter(user_id=user_id, name_lower__startswith=prefix.lower())
+        .order_by("name_lower", "name", "id")
+        .values("id", "name")[:limit]
+    )
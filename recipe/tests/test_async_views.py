@@ -0,0 +1,139 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe, Tag
+from core.tests.utils import APIClient
+from recipe import views
+from recipe.async_views import async_read_urls, async_read_view
+from recipe.urls import router
+from user.authentication import create_access_token, token_cache
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id: int) -> str:
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+@override_settings(CACHE_SHARED=True)
+class AsyncReadViewTest(TestCase):
+    """Test serving recipe reads from async views"""
+
+    def setUp(self) -> None:
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.token = Token.objects.create(user=self.user)
+        self.auth = f"Token {self.token.key}"
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+        self.factory = AsyncRequestFactory()
+        self.recipe_list = async_read_view(
+            views.RecipeViewSet.as_view({"get": "list", "post": "create"})
+        )
+        self.recipe_detail = async_read_view(
+            views.RecipeViewSet.as_view({"get": "retrieve"})
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="Pancakes", time_minutes=10, price=5
+        )
+
+    async def test_reads_hop_to_worker_thread_once(self):
+        """Test a read runs the sync view in a worker thread a single time"""
+        expected = await self._sync_get(RECIPES_URL)
+
+        with mock.patch(
+            "recipe.async_views.sync_to_async", wraps=sync_to_async
+        ) as thread_hop:
+            response = await self.recipe_list(self._request(RECIPES_URL))
+
+        thread_hop.assert_called_once()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    async def test_access_token_reads(self):
+        """Test a list is served to an access token"""
+        expected = await self._sync_get(RECIPES_URL)
+        request = self.factory.get(
+            RECIPES_URL, authorization=f"Bearer {create_access_token(self.user)}"
+        )
+
+        response = await self.recipe_list(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    async def test_not_modified(self):
+        """Test a conditional retrieve is answered with not modified"""
+        url = detail_url(self.recipe.id)
+        etag = (await self._sync_get(url))["ETag"]
+
+        response = await self.recipe_detail(
+            self._request(url, **{"if-none-match": etag}), pk=self.recipe.id
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_uncached_reads_use_database(self):
+        """Test reads needing the database match the sync views"""
+        url = detail_url(self.recipe.id)
+
+        response = await self.recipe_detail(self._request(url), pk=self.recipe.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, (await self._sync_get(url)).content)
+
+    async def test_writes_delegated_to_sync_view(self):
+        """Test writes through an async route are handled by the sync view"""
+        request = self.factory.post(
+            TAGS_URL,
+            {"name": "Vegan"},
+            content_type="application/json",
+            authorization=self.auth,
+        )
+        view = async_read_view(views.TagViewSet.as_view({"post": "create"}))
+
+        response = await view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await sync_to_async(Tag.objects.filter(name="Vegan").exists)())
+
+    async def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected"""
+        request = self.factory.get(RECIPES_URL, authorization="Token invalid")
+
+        response = await self.recipe_list(request)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_async_middleware(self):
+        """Test the middleware measures a request served by the async handler"""
+        response = await self.async_client.get(RECIPES_URL, authorization=self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+
+    def test_router_reads_served_async(self):
+        """Test list and detail routes of the router are replaced by async views"""
+        callbacks = {
+            pattern.name: pattern.callback for pattern in async_read_urls(router.urls)
+        }
+
+        self.assertTrue(asyncio.iscoroutinefunction(callbacks["recipe-detail"]))
+        self.assertTrue(asyncio.iscoroutinefunction(callbacks["tag-list"]))
+        self.assertFalse(asyncio.iscoroutinefunction(callbacks["api-root"]))
+
+    # Helpers
+    def _request(self, url, **headers):
+        return self.factory.get(url, authorization=self.auth, **headers)
+
+    async def _sync_get(self, url):
+        return await sync_to_async(self.client.get)(url)
@@ -0,0 +1,218 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import APIClient
+from recipe.cache import bump_user_version, get_user_version
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def recipe_detail_url(recipe_id: int) -> str:
+    """Return the URL for the recipe detail"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class UserVersionTest(TestCase):
+    """Test the per-user cache version"""
+
+    def test_bump_user_version(self):
+        """Test bumping a user version changes it"""
+        version = get_user_version(4242)
+
+        bump_user_version(4242)
+
+        self.assertGreater(get_user_version(4242), version)
+
+    def test_recipe_change_bumps_owner_version(self):
+        """Test saving a recipe object only bumps the version of its owner"""
+        user = get_user_model().objects.create_user("test@test.com", "password1!")
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        version = get_user_version(user.pk)
+        other_version = get_user_version(other_user.pk)
+
+        Tag.objects.create(user=user, name="Vegan")
+
+        self.assertGreater(get_user_version(user.pk), version)
+        self.assertEqual(get_user_version(other_user.pk), other_version)
+
+
+@override_settings(CACHE_SHARED=True)
+class CachedListApiTest(TestCase):
+    """Test list endpoints are cached per user and invalidated on writes"""
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Test listing twice does not query the database the second time"""
+        Recipe.objects.create(user=self.user, title="Soup", time_minutes=5, price=2)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_cached_separately(self):
+        """Test different query params do not share a cache entry"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=2
+        )
+        Recipe.objects.create(user=self.user, title="Steak", time_minutes=5, price=2)
+        recipe.tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        response = self.client.get(RECIPES_URL, {"tags": str(tag.id)})
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_create_invalidates_list(self):
+        """Test creating objects through the API invalidates cached lists"""
+        for url, payload in (
+            (TAGS_URL, {"name": "Vegan"}),
+            (INGREDIENTS_URL, {"name": "Tofu"}),
+            (RECIPES_URL, {"title": "Soup", "time_minutes": 5, "price": 2}),
+        ):
+            self.assertEqual(len(self.client.get(url).data["results"]), 0)
+
+            self.client.post(url, payload)
+
+            self.assertEqual(len(self.client.get(url).data["results"]), 1)
+
+    def test_update_and_delete_invalidate_list(self):
+        """Test updating and deleting a recipe invalidates cached lists"""
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=2
+        )
+        self.client.get(RECIPES_URL)
+
+        self.client.patch(recipe_detail_url(recipe.id), {"title": "Stew"})
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.data["results"][0]["title"], "Stew")
+
+        self.client.delete(recipe_detail_url(recipe.id))
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_relation_change_invalidates_list(self):
+        """Test changing the ingredients of a recipe invalidates cached lists"""
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=2
+        )
+        ingredient = Ingredient.objects.create(user=self.user, name="Leek")
+        self.client.get(RECIPES_URL)
+
+        recipe.ingredients.add(ingredient)
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(response.data["results"][0]["ingredients"]), 1)
+
+    def test_cache_limited_to_user(self):
+        """Test a cached list is never served to another user"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_URL)
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        self.client.force_authenticate(other_user)
+
+        response = self.client.get(TAGS_URL)
+
+        self.assertEqual(response.data["results"], [])
+
+
+@override_settings(CACHE_SHARED=True)
+class ConditionalGetApiTest(TestCase):
+    """Test conditional GET on the recipe endpoints"""
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=2
+        )
+
+    def test_unchanged_recipes_not_modified(self):
+        """Test revalidating unchanged recipes returns 304 without queries"""
+        for url in (RECIPES_URL, recipe_detail_url(self.recipe.id)):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("Last-Modified", response)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+    def test_modified_since_ignored(self):
+        """Test a change in the same second is returned despite If-Modified-Since"""
+        url = recipe_detail_url(self.recipe.id)
+        self.client.get(url)
+
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["tags"]), 1)
+
+    def test_changed_recipes_return_new_etag(self):
+        """Test revalidating after a change returns the new payload"""
+        url = recipe_detail_url(self.recipe.id)
+        etag = self.client.get(url)["ETag"]
+
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["tags"]), 1)
+
+    def test_etag_differs_per_resource(self):
+        """Test a list and a detail response never share an ETag"""
+        list_etag = self.client.get(RECIPES_URL)["ETag"]
+
+        response = self.client.get(
+            recipe_detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=list_etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ProcessLocalCacheApiTest(TestCase):
+    """Test responses are neither cached nor validated without a shared cache"""
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_lists_not_cached(self):
+        """Test lists are read from the database without ETags"""
+        self.client.get(RECIPES_URL)
+        # a write seen by another worker only would not bump this process' version
+        Recipe.objects.bulk_create(
+            [Recipe(user=self.user, title="Soup", time_minutes=5, price=2)]
+        )
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertNotIn("ETag", response)
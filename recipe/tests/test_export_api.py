@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import APIClient
+from recipe.serializers import RecipeDetailSerializer
+
+
+EXPORT_URL = reverse("recipe:export")
+
+
+def sample_recipe(user, title: str = "Pumpkin Pie") -> Recipe:
+    """Create and return a sample recipe with a tag and an ingredient"""
+    recipe = Recipe.objects.create(user=user, title=title, time_minutes=10, price=5)
+    recipe.tags.add(Tag.objects.create(user=user, name=f"{title} tag"))
+    recipe.ingredients.add(Ingredient.objects.create(user=user, name=f"{title} ing"))
+    return recipe
+
+
+class PublicExportApiTest(TestCase):
+    """Test unauthenticated export API access"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test authentication is required to export recipes"""
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTest(TestCase):
+    """Test exporting the recipes of the authenticated user"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client.force_authenticate(self.user)
+
+    def test_export_ndjson(self):
+        """Test recipes are streamed as NDJSON like the detail endpoint"""
+        recipes = [sample_recipe(self.user, f"Recipe {i}") for i in range(3)]
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        sample_recipe(other_user)
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        expected = RecipeDetailSerializer(recipes[::-1], many=True).data
+        self.assertEqual(rows, json.loads(json.dumps(expected)))
+
+    def test_export_csv(self):
+        """Test recipes are streamed as CSV with relation names"""
+        recipe = sample_recipe(self.user)
+
+        response = self.client.get(EXPORT_URL, {"format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self._content(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(recipe.id))
+        self.assertEqual(rows[0]["title"], recipe.title)
+        self.assertEqual(rows[0]["tags"], "Pumpkin Pie tag")
+        self.assertEqual(rows[0]["ingredients"], "Pumpkin Pie ing")
+
+    def test_export_csv_without_recipes(self):
+        """Test exporting no recipes still returns the CSV header"""
+        response = self.client.get(EXPORT_URL, HTTP_ACCEPT="text/csv")
+
+        self.assertEqual(
+            self._content(response).strip(),
+            "id,title,time_minutes,price,link,tags,ingredients",
+        )
+
+    def test_export_queries_per_chunk(self):
+        """Test related objects are loaded per chunk, not per recipe"""
+        for i in range(10):
+            sample_recipe(self.user, f"Recipe {i}")
+
+        response = self.client.get(EXPORT_URL)
+        with CaptureQueriesContext(connection) as queries:
+            rows = self._content(response).splitlines()
+
+        self.assertEqual(len(rows), 10)
+        # the recipes, then their ingredients and tags for the single chunk
+        self.assertEqual(len(queries), 3)
+
+    def test_export_reads_relations_from_request_database(self):
+        """Test relations are read from the database the recipes are read from"""
+        sample_recipe(self.user)
+
+        response = self.client.get(EXPORT_URL)
+        # once the request is over the router no longer knows the request database
+        with mock.patch(
+            "core.replicas.ReplicaRouter.db_for_read", return_value="unknown"
+        ):
+            rows = self._content(response).splitlines()
+
+        self.assertEqual(len(json.loads(rows[0])["tags"]), 1)
+
+    # Helpers
+    def _content(self, response) -> str:
+        return b"".join(response.streaming_content).decode()
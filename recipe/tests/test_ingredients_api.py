@@ -4,9 +4,9 @@ from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
-from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
+from core.tests.utils import APIClient
 
 from recipe.serializers import IngredientSerializer
 
@@ -49,7 +49,7 @@ class PrivateIngredientApiTest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that ingredients are limited to authenticated user's ingredients"""
@@ -60,8 +60,8 @@ class PrivateIngredientApiTest(TestCase):
         response = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], ingredient.name)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], ingredient.name)
 
     def test_create_ingredient_successful(self):
         """Test creating an ingredient"""
@@ -81,3 +81,43 @@ class PrivateIngredientApiTest(TestCase):
         response = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_ingredients_assigned_to_recipes(self):
+        """Test filtering ingredients by those assigned to recipes"""
+        ingredient1 = Ingredient.objects.create(user=self.user, name="Apple")
+        ingredient2 = Ingredient.objects.create(user=self.user, name="Turkey")
+        recipe = Recipe.objects.create(
+            user=self.user, title="Apple crumble", time_minutes=5, price=10.00
+        )
+        recipe.ingredients.add(ingredient1)
+
+        response = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [item["name"] for item in response.data["results"]]
+        self.assertIn(ingredient1.name, names)
+        self.assertNotIn(ingredient2.name, names)
+
+    def test_retrieve_ingredients_assigned_unique(self):
+        """Test filtering ingredients by assigned returns unique items"""
+        ingredient = Ingredient.objects.create(user=self.user, name="Eggs")
+        Ingredient.objects.create(user=self.user, name="Cheese")
+        for title in ("Eggs benedict", "Coriander eggs on toast"):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=30, price=12.00
+            )
+            recipe.ingredients.add(ingredient)
+
+        response = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_bulk_create_ingredients(self):
+        """Test creating many ingredients in one request"""
+        payload = [{"name": "Apple"}, {"name": "Pear"}]
+
+        response = self.client.post(INGREDIENTS_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item["name"] for item in response.data], ["Apple", "Pear"])
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
@@ -1,17 +1,28 @@
 from typing import Dict
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
 
 from core.models import Recipe, Ingredient, Tag
+from core.tests.utils import APIClient
 import recipe
-from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.serializers import (
+    RECIPE_ROW_FIELDS,
+    RecipeDetailSerializer,
+    RecipeRowSerializer,
+    RecipeSerializer,
+    recipe_rows,
+)
 
 
 RECIPES_URL = reverse("recipe:recipe-list")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk-update")
 
 
 def recipe_detail_url(recipe_id: int) -> str:
@@ -74,7 +85,7 @@ class PrivateRecipeEndpointTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_recipe_limited_to_authenticated_user(self):
         """Test list recipes return only recipes for authenticated user"""
@@ -89,8 +100,92 @@ class PrivateRecipeEndpointTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"], serializer.data)
+
+    def test_recipes_paginated_with_cursor(self):
+        """Test recipes are paginated newest first and next links are followed"""
+        recipes = [sample_recipe(user=self.user, title=f"Recipe {i}") for i in range(3)]
+
+        response = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [recipes[2].id, recipes[1].id],
+        )
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [recipes[0].id]
+        )
+        self.assertIsNone(response.data["next"])
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_recipes_page_size_is_capped(self):
+        """Test the requested page size cannot exceed the configured maximum"""
+        for i in range(3):
+            sample_recipe(user=self.user, title=f"Recipe {i}")
+
+        response = self.client.get(RECIPES_URL, {"page_size": 50})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    @override_settings(API_PAGE_SIZE=2)
+    def test_recipes_default_page_size(self):
+        """Test the default page size is read from the settings"""
+        for i in range(3):
+            sample_recipe(user=self.user, title=f"Recipe {i}")
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_filter_recipes_by_tags(self):
+        """Test returning recipes with any of the specified tags"""
+        recipe1 = sample_recipe(user=self.user, title="Thai vegetable curry")
+        recipe2 = sample_recipe(user=self.user, title="Aubergine with tahini")
+        recipe3 = sample_recipe(user=self.user, title="Fish and chips")
+        tag1 = sample_tag(user=self.user, name="Vegan")
+        tag2 = sample_tag(user=self.user, name="Vegetarian")
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        response = self.client.get(RECIPES_URL, {"tags": f"{tag1.id},{tag2.id}"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_by_tags_and_ingredients(self):
+        """Test tag and ingredient filters must both match"""
+        recipe1 = sample_recipe(user=self.user, title="Posh beans on toast")
+        recipe2 = sample_recipe(user=self.user, title="Chicken cacciatore")
+        tag = sample_tag(user=self.user, name="Comfort")
+        ingredient = sample_ingredient(user=self.user, name="Beans")
+        recipe1.tags.add(tag)
+        recipe1.ingredients.add(ingredient)
+        recipe2.tags.add(tag)
+
+        response = self.client.get(
+            RECIPES_URL, {"tags": str(tag.id), "ingredients": str(ingredient.id)}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        serializer = RecipeSerializer(recipe1)
+        self.assertEqual(response.data["results"], [serializer.data])
+
+    def test_filter_recipes_with_invalid_ids_fails(self):
+        """Test filtering recipes with ids that are not integers is rejected"""
+        response = self.client.get(RECIPES_URL, {"tags": "1,vegan"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail"""
@@ -106,6 +201,34 @@ class PrivateRecipeEndpointTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_list_recipes_query_count_does_not_grow(self):
+        """Test listing recipes runs a constant number of queries"""
+        self._create_recipes_with_relations(1)
+        with CaptureQueriesContext(connection) as small_list:
+            response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_recipes_with_relations(20)
+        with self.assertNumQueries(len(small_list)):
+            response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 21)
+
+    def test_recipe_detail_query_count_does_not_grow(self):
+        """Test retrieving a recipe does not query once per related object"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+        with CaptureQueriesContext(connection) as few_relations:
+            self.client.get(recipe_detail_url(recipe.id))
+
+        for i in range(10):
+            recipe.tags.add(sample_tag(user=self.user, name=f"tag {i}"))
+            recipe.ingredients.add(sample_ingredient(user=self.user, name=f"ing {i}"))
+        with self.assertNumQueries(len(few_relations)):
+            response = self.client.get(recipe_detail_url(recipe.id))
+        self.assertEqual(len(response.data["tags"]), 11)
+
     def test_create_basic_recipe(self):
         """Test creating a recipe with no tags or ingredients"""
         payload = {
@@ -203,3 +326,202 @@ class PrivateRecipeEndpointTest(TestCase):
         self.assertEqual(recipe.time_minutes, payload["time_minutes"])
         self.assertEqual(float(recipe.price), payload["price"])
         self.assertEqual(recipe.tags.count(), 0)
+
+    @skipUnlessDBFeature("can_return_rows_from_bulk_insert")
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes with their relations in one request"""
+        tag = sample_tag(user=self.user)
+        ingredients = [
+            sample_ingredient(user=self.user, name=name) for name in ("Lime", "Tofu")
+        ]
+        payload = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [tag.id],
+                "ingredients": [ingredient.id for ingredient in ingredients],
+            }
+            for i in range(20)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(len(response.data), 20)
+        recipes = Recipe.objects.filter(user=self.user).order_by("id")
+        self.assertEqual(recipes.count(), 20)
+        self.assertEqual(
+            response.data, RecipeSerializer(recipes, many=True).data
+        )
+        self.assertEqual(list(recipes[0].tags.all()), [tag])
+        self.assertEqual(recipes[0].ingredients.count(), 2)
+
+    def test_bulk_create_recipes_reports_item_errors(self):
+        """Test invalid items are reported per item and nothing is created"""
+        payload = [
+            {
+                "title": "Soup",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [],
+                "ingredients": [],
+            },
+            {"title": "Stew", "price": "5.00", "tags": [9999], "ingredients": []},
+        ]
+
+        response = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("time_minutes", response.data[1])
+        self.assertIn("tags", response.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_recipes_rejects_inexact_ids(self):
+        """Test booleans and fractional numbers are not taken as related ids"""
+        tag = sample_tag(user=self.user)
+        payload = [
+            {"title": "Soup", "time_minutes": 10, "price": "5.00", "tags": [value]}
+            for value in (True, tag.id + 0.9)
+        ]
+
+        response = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for errors in response.data:
+            self.assertEqual(errors["tags"][0].code, "incorrect_type")
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(API_MAX_BULK_SIZE=2)
+    def test_bulk_create_recipes_size_is_capped(self):
+        """Test bulk payloads larger than the configured maximum are rejected"""
+        payload = [{"title": "Soup", "time_minutes": 10, "price": "5.00"}] * 3
+
+        response = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_partial_update_recipes(self):
+        """Test partially updating many recipes in one request"""
+        recipe1 = sample_recipe(user=self.user, title="Soup")
+        recipe2 = sample_recipe(user=self.user, title="Stew")
+        old_tag = sample_tag(user=self.user, name="Old")
+        new_tag = sample_tag(user=self.user, name="New")
+        recipe1.tags.add(old_tag)
+        recipe2.tags.add(old_tag)
+        payload = [
+            {"id": recipe1.id, "title": "Leek soup", "tags": [new_tag.id]},
+            {"id": recipe2.id, "time_minutes": 45},
+        ]
+
+        response = self.client.patch(RECIPES_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, "Leek soup")
+        self.assertEqual(list(recipe1.tags.all()), [new_tag])
+        self.assertEqual(recipe2.title, "Stew")
+        self.assertEqual(recipe2.time_minutes, 45)
+        self.assertEqual(list(recipe2.tags.all()), [old_tag])
+        self.assertEqual(response.data[0]["tags"], [new_tag.id])
+
+    def test_bulk_partial_update_other_user_recipe_fails(self):
+        """Test bulk updates cannot touch recipes of another user"""
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        recipe = sample_recipe(user=other_user, title="Soup")
+
+        response = self.client.patch(
+            RECIPES_BULK_URL, [{"id": recipe.id, "title": "Stolen"}], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", response.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Soup")
+
+    def test_bulk_partial_update_repeated_recipe_fails(self):
+        """Test a bulk update cannot update the same recipe twice"""
+        recipe = sample_recipe(user=self.user, title="Soup")
+        tag = sample_tag(user=self.user, name="Vegan")
+        payload = [
+            {"id": recipe.id, "tags": [tag.id]},
+            {"id": recipe.id, "tags": [tag.id]},
+        ]
+
+        response = self.client.patch(RECIPES_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("id", response.data[1])
+        self.assertEqual(recipe.tags.count(), 0)
+
+    def test_bulk_partial_update_string_id(self):
+        """Test items may identify their recipe with a numeric string"""
+        recipe = sample_recipe(user=self.user, title="Soup")
+
+        response = self.client.patch(
+            RECIPES_BULK_URL, [{"id": str(recipe.id), "title": "Stew"}], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Stew")
+
+    # Helpers
+    def _create_recipes_with_relations(self, count: int):
+        for i in range(count):
+            recipe = sample_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(sample_tag(user=self.user, name=f"Tag {i}"))
+            recipe.ingredients.add(sample_ingredient(user=self.user, name=f"Ing {i}"))
+
+
+class RecipeRowSerializerTest(TestCase):
+    """Test the read only serializer of recipe rows used by lists"""
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        tags = [sample_tag(self.user, name=f"Tag {i}") for i in range(3)]
+        ingredients = [sample_ingredient(self.user, name=f"Ing {i}") for i in range(3)]
+        sample_recipe(self.user, title="Plain", price="5.5")
+        recipe = sample_recipe(self.user, title="Soup", link="https://soup.test")
+        recipe.tags.add(tags[2], tags[0])
+        recipe.ingredients.add(*reversed(ingredients))
+        sample_recipe(self.user, title="Salad", time_minutes=5).tags.add(tags[1])
+
+    def test_rows_render_like_recipe_serializer(self):
+        """Test recipe rows render byte for byte like RecipeSerializer"""
+        recipes = Recipe.objects.order_by("-id")
+
+        self.assertEqual(
+            self._render(RecipeRowSerializer(recipe_rows(recipes), many=True)),
+            self._render(RecipeSerializer(self._prefetched(recipes), many=True)),
+        )
+
+    def test_rows_without_aggregated_ids(self):
+        """Test the ids of relations are loaded for rows without aggregates"""
+        recipes = Recipe.objects.order_by("-id")
+
+        with self.assertNumQueries(3):
+            rendered = self._render(
+                RecipeRowSerializer(recipes.values(*RECIPE_ROW_FIELDS), many=True)
+            )
+
+        self.assertEqual(
+            rendered,
+            self._render(RecipeSerializer(self._prefetched(recipes), many=True)),
+        )
+
+    # Helpers
+    def _prefetched(self, recipes):
+        return recipes.prefetch_related(
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+        )
+
+    def _render(self, serializer) -> bytes:
+        return JSONRenderer().render(serializer.data)
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import APIClient
+from recipe.signals import deleting
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def sample_recipe(user, title: str) -> Recipe:
+    """Create and return a sample recipe"""
+    return Recipe.objects.create(user=user, title=title, time_minutes=10, price=5)
+
+
+class RecipeSearchApiTest(TestCase):
+    """Test searching recipes by title, tags and ingredients"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client.force_authenticate(self.user)
+
+    def test_search_title_tags_and_ingredients(self):
+        """Test recipes match on their title, tag names and ingredient names"""
+        by_title = sample_recipe(self.user, "Mushroom risotto")
+        by_tag = sample_recipe(self.user, "Forest pie")
+        by_tag.tags.add(Tag.objects.create(user=self.user, name="Mushroom"))
+        by_ingredient = sample_recipe(self.user, "Stroganoff")
+        by_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Mushrooms")
+        )
+        sample_recipe(self.user, "Apple crumble")
+
+        response = self._search("mushroom")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [recipe["id"] for recipe in response.data]
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(set(ids), {by_title.id, by_tag.id, by_ingredient.id})
+        # a title match ranks first
+        self.assertEqual(ids[0], by_title.id)
+
+    def test_search_requires_every_word(self):
+        """Test recipes must match every searched word"""
+        recipe = sample_recipe(self.user, "Leek soup")
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Winter"))
+        sample_recipe(self.user, "Tomato soup")
+
+        response = self._search("winter soup")
+
+        self.assertEqual([item["id"] for item in response.data], [recipe.id])
+
+    def test_search_follows_relation_changes(self):
+        """Test renaming or removing a tag updates the search results"""
+        recipe = sample_recipe(self.user, "Pancakes")
+        tag = Tag.objects.create(user=self.user, name="Breakfast")
+        recipe.tags.add(tag)
+
+        tag.name = "Brunch"
+        tag.save()
+
+        self.assertEqual(self._search("breakfast").data, [])
+        self.assertEqual(len(self._search("brunch").data), 1)
+
+        recipe.tags.remove(tag)
+
+        self.assertEqual(self._search("brunch").data, [])
+
+    @skipUnlessDBFeature("can_return_rows_from_bulk_insert")
+    def test_search_finds_bulk_created_recipes(self):
+        """Test recipes created in bulk are searchable"""
+        payload = [
+            {
+                "title": "Lemon tart",
+                "time_minutes": 40,
+                "price": "6.00",
+                "tags": [],
+                "ingredients": [],
+            }
+        ]
+        self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(len(self._search("lemon").data), 1)
+
+    def test_search_limited_to_user(self):
+        """Test search only returns recipes of the authenticated user"""
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        sample_recipe(other_user, "Lemon tart")
+
+        self.assertEqual(self._search("lemon").data, [])
+
+    @override_settings(RECIPE_SEARCH_LIMIT=2)
+    def test_search_results_limited(self):
+        """Test search returns at most the configured number of recipes"""
+        for i in range(3):
+            sample_recipe(self.user, f"Lemon tart {i}")
+
+        self.assertEqual(len(self._search("lemon").data), 2)
+
+    def test_search_follows_deleted_tags(self):
+        """Test recipes stop matching tags deleted in bulk"""
+        recipe = sample_recipe(self.user, "Pancakes")
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name="Breakfast"),
+            Tag.objects.create(user=self.user, name="Sweet"),
+        )
+
+        with deleting(Tag.objects.filter(user=self.user)):
+            Tag.objects.filter(user=self.user).delete()
+
+        self.assertEqual(self._search("breakfast").data, [])
+        self.assertEqual(len(self._search("pancakes").data), 1)
+
+    def test_deleting_user_queries_once_per_table(self):
+        """Test deleting a user takes as many queries for few or many rows"""
+        users = get_user_model().objects.filter(email__in=["a@test.com", "b@test.com"])
+        few = self._delete_user_queries(users, "a@test.com", 2)
+        many = self._delete_user_queries(users, "b@test.com", 20)
+
+        self.assertEqual(many, few)
+
+    # Helpers
+    def _delete_user_queries(self, users, email, count):
+        user = get_user_model().objects.create_user(email, "pass1!")
+        for i in range(count):
+            recipe = sample_recipe(user, f"Soup {i}")
+            recipe.tags.add(Tag.objects.create(user=user, name=f"Tag {i}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=user, name=f"Ingredient {i}")
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            with deleting(users):
+                users.delete()
+
+        return len(queries)
+
+    def _search(self, text):
+        return self.client.get(RECIPES_URL, {"search": text})
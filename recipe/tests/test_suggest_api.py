@@ -0,0 +1,154 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import APIClient
+from recipe import suggest
+from recipe.suggest import PrefixIndex
+
+
+INGREDIENTS_SUGGEST_URL = reverse("recipe:ingredient-suggest")
+TAGS_SUGGEST_URL = reverse("recipe:tag-suggest")
+
+
+class PrefixIndexTest(SimpleTestCase):
+    """Test the in-process prefix index"""
+
+    def test_match_prefix(self):
+        """Test names are matched case insensitively and in order"""
+        index = PrefixIndex([(1, "tomato"), (2, "Tofu"), (3, "Bread"), (4, "tonic")])
+
+        self.assertEqual(
+            index.match("TO", 10),
+            [
+                {"id": 2, "name": "Tofu"},
+                {"id": 1, "name": "tomato"},
+                {"id": 4, "name": "tonic"},
+            ],
+        )
+        self.assertEqual(index.match("tom", 10), [{"id": 1, "name": "tomato"}])
+        self.assertEqual(index.match("x", 10), [])
+        self.assertEqual(len(index.match("to", 2)), 2)
+
+    def test_match_latency(self):
+        """Test lookups among 50k names take well under a millisecond"""
+        index = PrefixIndex((i, f"ingredient {i}") for i in range(50_000))
+        prefixes = [f"ingredient {i}" for i in range(0, 50_000, 50)]
+
+        started = time.perf_counter()
+        for prefix in prefixes:
+            index.match(prefix, 10)
+        per_lookup = (time.perf_counter() - started) / len(prefixes)
+
+        self.assertLess(per_lookup, 0.001)
+
+
+@override_settings(CACHE_SHARED=True)
+class SuggestApiTest(TestCase):
+    """Test suggesting tags and ingredients by prefix"""
+
+    def setUp(self) -> None:
+        suggest._indexes.clear()
+        suggest._cached_entries = 0
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client.force_authenticate(self.user)
+
+    def test_suggest_ingredients(self):
+        """Test ingredients starting with the prefix are suggested"""
+        tofu = Ingredient.objects.create(user=self.user, name="Tofu")
+        Ingredient.objects.create(user=self.user, name="Leek")
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        Ingredient.objects.create(user=other_user, name="Tomato")
+
+        response = self.client.get(INGREDIENTS_SUGGEST_URL, {"q": "to"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": tofu.id, "name": "Tofu"}])
+
+    def test_suggest_served_from_memory(self):
+        """Test repeated suggestions do not query the database"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(TAGS_SUGGEST_URL, {"q": "ve"})
+
+        self.assertEqual([tag["name"] for tag in response.data], ["Vegan"])
+
+    def test_suggest_kept_when_recipes_change(self):
+        """Test changing recipes keeps the index of tag names"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        recipe = Recipe.objects.create(
+            user=self.user, title="Curry", time_minutes=10, price=5
+        )
+        recipe.tags.add(tag)
+
+        with self.assertNumQueries(0):
+            self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+    @override_settings(SUGGEST_CACHE_ENTRIES=3)
+    def test_suggest_cache_bounded_by_names(self):
+        """Test the least recently used indexes are evicted past the name limit"""
+        other_user = get_user_model().objects.create_user("other@test.com", "pass1!")
+        for name in ("Vegan", "Vegetarian"):
+            Tag.objects.create(user=self.user, name=name)
+            Tag.objects.create(user=other_user, name=name)
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        self.client.force_authenticate(other_user)
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        cached = suggest._indexes
+        self.assertNotIn((Tag._meta.label, self.user.pk), cached)
+        self.assertIn((Tag._meta.label, other_user.pk), cached)
+        self.assertLessEqual(suggest._cached_entries, 3)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_suggest_from_database_without_shared_cache(self):
+        """Test names are matched by the database when the cache is per process"""
+        for name in ("vegetarian", "Vegan", "Leek", "Very hot"):
+            Tag.objects.create(user=self.user, name=name)
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(TAGS_SUGGEST_URL, {"q": "VE", "limit": 2})
+
+        self.assertEqual(
+            [tag["name"] for tag in response.data], ["Vegan", "vegetarian"]
+        )
+        self.assertNotIn((Tag._meta.label, self.user.pk), suggest._indexes)
+
+    def test_suggest_includes_created_tags(self):
+        """Test creating a tag makes it suggested right away"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        self.client.post(reverse("recipe:tag-list"), {"name": "Vegetarian"})
+        response = self.client.get(TAGS_SUGGEST_URL, {"q": "v"})
+
+        self.assertEqual(
+            [tag["name"] for tag in response.data], ["Vegan", "Vegetarian"]
+        )
+
+    def test_suggest_limit(self):
+        """Test the number of suggestions can be limited"""
+        for name in ("Apple", "Apricot", "Avocado"):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        response = self.client.get(INGREDIENTS_SUGGEST_URL, {"q": "a", "limit": 2})
+
+        self.assertEqual([item["name"] for item in response.data], ["Apple", "Apricot"])
+
+    def test_suggest_requires_prefix(self):
+        """Test a prefix is required"""
+        response = self.client.get(INGREDIENTS_SUGGEST_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -3,9 +3,9 @@ from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
-from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
+from core.tests.utils import APIClient
 
 from recipe.serializers import TagSerializer
 
@@ -45,7 +45,25 @@ class PrivateTagsApiTest(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
+
+    def test_tags_paginated_by_name(self):
+        """Test tags are paginated in reverse name order"""
+        for name in ("breakfast", "dessert", "vegan"):
+            Tag.objects.create(user=self.user, name=name)
+
+        response = self.client.get(TAGS_URL, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag["name"] for tag in response.data["results"]], ["vegan", "dessert"]
+        )
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(
+            [tag["name"] for tag in response.data["results"]], ["breakfast"]
+        )
 
     def test_tags_limited_to_logged_in_user(self):
         """test that tags returned are limited to the logged in user"""
@@ -58,8 +76,8 @@ class PrivateTagsApiTest(TestCase):
         response = self.client.get(TAGS_URL)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], tag.name)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], tag.name)
 
     def test_create_tag_successful(self):
         """test create a tag"""
@@ -79,3 +97,43 @@ class PrivateTagsApiTest(TestCase):
         response = self.client.post(TAGS_URL, payload)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_tags_assigned_to_recipes(self):
+        """Test filtering tags by those assigned to recipes"""
+        tag1 = Tag.objects.create(user=self.user, name="Apple")
+        tag2 = Tag.objects.create(user=self.user, name="Turkey")
+        recipe = Recipe.objects.create(
+            user=self.user, title="Apple crumble", time_minutes=5, price=10.00
+        )
+        recipe.tags.add(tag1)
+
+        response = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [item["name"] for item in response.data["results"]]
+        self.assertIn(tag1.name, names)
+        self.assertNotIn(tag2.name, names)
+
+    def test_retrieve_tags_assigned_unique(self):
+        """Test filtering tags by assigned returns unique items"""
+        tag = Tag.objects.create(user=self.user, name="Eggs")
+        Tag.objects.create(user=self.user, name="Cheese")
+        for title in ("Eggs benedict", "Coriander eggs on toast"):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=30, price=12.00
+            )
+            recipe.tags.add(tag)
+
+        response = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_bulk_create_tags(self):
+        """Test creating many tags in one request"""
+        payload = [{"name": "Apple"}, {"name": "Pear"}]
+
+        response = self.client.post(TAGS_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item["name"] for item in response.data], ["Apple", "Pear"])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
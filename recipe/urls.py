@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from recipe import views
+from recipe.async_views import async_read_urls
 
 app_name = "recipe"
 
@@ -9,6 +11,11 @@ router.register("tags", views.TagViewSet)
 router.register("ingredients", views.IngredientViewSet)
 router.register("recipes", views.RecipeViewSet)
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_urls(router_urls)
+
 urlpatterns = [
-    path("", include(router.urls)),
+    path("export/", views.ExportRecipesView.as_view(), name="export"),
+    path("", include(router_urls)),
 ]
@@ -1,37 +1,121 @@
-from django.db.models import query
-from rest_framework import serializers, viewsets, mixins, authentication, permissions
-from rest_framework.decorators import authentication_classes, permission_classes
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Exists, OuterRef, Prefetch, prefetch_related_objects, query
+from django.http import StreamingHttpResponse
+from rest_framework import (
+    serializers,
+    viewsets,
+    mixins,
+    permissions,
+    status,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import (
+    action,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from core.models import Recipe, Tag, Ingredient
+from recipe.cache import CachedListMixin, ConditionalGetMixin, invalidate_user
+from recipe.renderers import CSVRenderer, NDJSONRenderer
+from recipe.search import search_recipes
+from recipe.suggest import suggest_names
+from recipe.pagination import RecipeAttributeCursorPagination, RecipeCursorPagination
 from recipe.serializers import (
     RecipeDetailSerializer,
+    RecipeRowSerializer,
     RecipeSerializer,
     TagSerializer,
     IngredientSerializer,
+    bulk_item_id,
+    recipe_rows,
 )
+from user.authentication import AccessTokenAuthentication, CachedTokenAuthentication
+
+
+class BulkCreateMixin:
+    """Create many objects at once when a list is posted instead of an object"""
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        self.check_bulk_size(request.data)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_bulk_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        """Save all objects for the current user, bulk inserts skip model signals"""
+        serializer.save(user=self.request.user)
+        invalidate_user(self.request.user.pk, names=self.queryset.model is not Recipe)
+
+    def check_bulk_size(self, data):
+        """Reject bulk payloads larger than the configured maximum"""
+        if len(data) > settings.API_MAX_BULK_SIZE:
+            raise ValidationError(
+                f"Ensure this list has no more than {settings.API_MAX_BULK_SIZE} items."
+            )
 
 
 class BaseRecipeAttributeViewSet(
-    viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin
+    BulkCreateMixin,
+    CachedListMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
 ):
     """Base viewset for user owned recipe attributes like tags and ingredients"""
 
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (AccessTokenAuthentication, CachedTokenAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = RecipeAttributeCursorPagination
 
     def get_queryset(self):
         """return object for the current authenticated user only"""
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.request.query_params.get("assigned_only") in ("1", "true"):
+            through = getattr(Recipe, self.recipe_relation).through
+            assignments = through.objects.filter(
+                **{self.queryset.model._meta.model_name: OuterRef("pk")}
+            )
+            queryset = queryset.filter(Exists(assignments))
+
+        return queryset.order_by("-name")
 
     def perform_create(self, serializer):
         """Create a new recipe attribute and assign it to the correct user"""
         serializer.save(user=self.request.user)
 
+    @action(methods=["get"], detail=False)
+    def suggest(self, request):
+        """Return the attributes whose name starts with the ?q= prefix"""
+        prefix = request.query_params.get("q", "").strip()
+        if not prefix:
+            raise ValidationError({"q": "This parameter is required."})
+
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer."})
+
+        return Response(
+            suggest_names(self.queryset, request.user.pk, prefix, max(limit, 1))
+        )
+
 
 class TagViewSet(BaseRecipeAttributeViewSet):
     """Manage tags in the database"""
 
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
+    recipe_relation = "tags"
 
 
 class IngredientViewSet(BaseRecipeAttributeViewSet):
@@ -39,27 +123,152 @@ class IngredientViewSet(BaseRecipeAttributeViewSet):
 
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_relation = "ingredients"
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    BulkCreateMixin, ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet
+):
     """Manage recipes in the database"""
 
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all().order_by("-id")
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (AccessTokenAuthentication, CachedTokenAuthentication)
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
 
     def get_queryset(self):
         """Return recipes for the current authenticated user only"""
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action == "retrieve":
+            return queryset.prefetch_related("ingredients", "tags")
+
+        if self.action == "list":
+            queryset = self._filter_by_relation(queryset, "tags", "tag")
+            queryset = self._filter_by_relation(queryset, "ingredients", "ingredient")
+
+            search = self.request.query_params.get("search")
+            if search:
+                limit = settings.RECIPE_SEARCH_LIMIT
+                queryset = search_recipes(queryset, search)[:limit]
+
+            # lists only render related ids, read as plain rows without instances
+            return recipe_rows(queryset)
+
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """Return search results unpaginated, they are ranked and limited instead"""
+        if self.request.query_params.get("search"):
+            return None
+
+        return super().paginate_queryset(queryset)
 
     def get_serializer_class(self):
         """Return appropirate serializer class based on action"""
         if self.action == "retrieve":
             return RecipeDetailSerializer
+        if self.action == "list":
+            return RecipeRowSerializer
 
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Assign the current authenticated user to recipe"""
         serializer.save(user=self.request.user)
+
+    @action(methods=["patch"], detail=False, url_path="bulk", url_name="bulk-update")
+    def bulk_update(self, request):
+        """Partially update many recipes identified by the id of each item"""
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of items.")
+
+        self.check_bulk_size(request.data)
+        ids = [bulk_item_id(item) for item in request.data]
+        recipes = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        serializer = self.get_serializer(
+            recipes, data=request.data, many=True, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+            invalidate_user(request.user.pk)
+
+        return Response(serializer.data)
+
+    def _filter_by_relation(self, queryset, param: str, field: str):
+        """Filter recipes linked to any of the comma separated ids of a query param"""
+        value = self.request.query_params.get(param)
+        if not value:
+            return queryset
+
+        try:
+            ids = [int(item) for item in value.split(",")]
+        except ValueError:
+            raise ValidationError({param: "Expected a comma separated list of ids"})
+
+        # a subquery on the m2m table returns each recipe once, without a DISTINCT
+        through = getattr(Recipe, param).through
+        recipe_ids = through.objects.filter(**{f"{field}_id__in": ids})
+        return queryset.filter(id__in=recipe_ids.values("recipe_id"))
+
+
+class ExportRecipesView(APIView):
+    """Stream every recipe of the authenticated user as NDJSON or CSV"""
+
+    authentication_classes = (AccessTokenAuthentication, CachedTokenAuthentication)
+    permission_classes = (permissions.IsAuthenticated,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    chunk_size = 500
+    csv_header = ("id", "title", "time_minutes", "price", "link", "tags", "ingredients")
+
+    def get(self, request):
+        # rows are streamed after the request left the replica routing context
+        self.database = router.db_for_read(Recipe)
+        renderer = request.accepted_renderer
+        if renderer.format == "csv":
+            content = renderer.stream(self.iter_csv_rows(), header=self.csv_header)
+        else:
+            content = renderer.stream(self.iter_rows())
+
+        response = StreamingHttpResponse(content, content_type=renderer.media_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+        return response
+
+    def iter_rows(self):
+        """Yield recipes serialized like the detail endpoint, one chunk at a time"""
+        # .iterator() streams from a server side cursor but ignores prefetching,
+        # so relations are prefetched for each chunk instead
+        recipes = (
+            Recipe.objects.using(self.database)
+            .filter(user=self.request.user)
+            .order_by("-id")
+        )
+        chunk = []
+        for recipe in recipes.iterator(chunk_size=self.chunk_size):
+            chunk.append(recipe)
+            if len(chunk) == self.chunk_size:
+                yield from self._serialize_chunk(chunk)
+                chunk = []
+
+        yield from self._serialize_chunk(chunk)
+
+    def iter_csv_rows(self):
+        """Yield recipe rows with tags and ingredients flattened to their names"""
+        for row in self.iter_rows():
+            row["tags"] = [tag["name"] for tag in row["tags"]]
+            row["ingredients"] = [
+                ingredient["name"] for ingredient in row["ingredients"]
+            ]
+            yield row
+
+    def _serialize_chunk(self, recipes):
+        prefetch_related_objects(
+            recipes,
+            Prefetch("ingredients", Ingredient.objects.using(self.database)),
+            Prefetch("tags", Tag.objects.using(self.database)),
+        )
+        return RecipeDetailSerializer(recipes, many=True).data
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipe_book.settings')
+# connections are per thread and Django 3.2 runs each ASGI request in a new one
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
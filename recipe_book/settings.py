@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "core",
@@ -45,7 +46,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.performance.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.replicas.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -80,14 +83,143 @@ WSGI_APPLICATION = "recipe_book.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.backends.postgresql",
         "HOST": os.getenv("DB_HOST", "localhost"),
+        "PORT": os.getenv("DB_PORT", ""),
         "NAME": os.getenv("DB_NAME", "app"),
         "USER": os.getenv("DB_USER", "jonathanrochette"),
         "PASSWORD": os.getenv("DB_PASS", ""),
+        # keep connections open between requests, checked before being reused
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        # pgbouncer transaction pooling cannot hold server side cursors open
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_PGBOUNCER", "0") == "1",
     }
 }
 
+# Read replicas, comma separated hosts sharing the credentials of the primary
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+]
+DATABASE_REPLICAS = [f"replica{index}" for index in range(1, len(DB_REPLICA_HOSTS) + 1)]
+for alias, host in zip(DATABASE_REPLICAS, DB_REPLICA_HOSTS):
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+
+# Seconds a user reads from the primary after changing its recipe data, and
+# the function telling whether a user changed it in the last seconds
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_RECENT_WRITE = "recipe.cache.modified_within"
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# Whether every worker process shares the default cache, like redis or
+# memcached. Cached lists, conditional GET with ETags and 304 Not Modified,
+# replica reads and the other features keeping state in the cache are only
+# correct, and only enabled, with a shared cache. Without one responses carry
+# no ETag. Set it to 1 to use the local memory cache with a single process.
+CACHE_SHARED = (
+    os.getenv(
+        "CACHE_SHARED",
+        "0" if CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHE_BACKENDS else "1",
+    )
+    == "1"
+)
+
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", 300))
+
+# Tag and ingredient names kept in process for suggestions, in all
+SUGGEST_CACHE_ENTRIES = int(os.getenv("SUGGEST_CACHE_ENTRIES", 200000))
+
+# Authentication tokens cached in process, in seconds
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", 60))
+
+# Lifetime of signed access and refresh tokens, in seconds
+ACCESS_TOKEN_LIFETIME = int(os.getenv("ACCESS_TOKEN_LIFETIME", 300))
+REFRESH_TOKEN_LIFETIME = int(os.getenv("REFRESH_TOKEN_LIFETIME", 14 * 24 * 3600))
+
+# Serve recipe, tag and ingredient reads with async views under ASGI. The
+# views still run in a worker thread, the middleware is async capable so a
+# request only hops to a thread once. Off by default.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "0") == "1"
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+# argon2 needs the argon2-cffi package and bcrypt the bcrypt package
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "core.hashers.PBKDF2PasswordHasher",
+    "argon2": "core.hashers.Argon2PasswordHasher",
+    "bcrypt": "core.hashers.BCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "pbkdf2")
+
+# the profile hashes new passwords, the others check older hashes, which are
+# upgraded to the profile on the next login
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ),
+]
+
+# costs, benchmark them with benchmarks/hashers.py
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 260000))
+# argon2 memory is in KiB, one lane keeps each hash on the core of its worker
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 19456))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 1))
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 10))
+
+# Threads hashing passwords, and hashes waiting for them before rejecting logins
+PASSWORD_HASHER_WORKERS = int(
+    os.getenv("PASSWORD_HASHER_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+)
+PASSWORD_HASHER_QUEUE_SIZE = int(os.getenv("PASSWORD_HASHER_QUEUE_SIZE", 32))
+
+REST_FRAMEWORK = {
+    # a full password hasher pool is answered with 429 Too Many Requests
+    "EXCEPTION_HANDLER": "core.exceptions.exception_handler",
+    # Reverse proxies in front of the app. Client IPs are read from the
+    # X-Forwarded-For entry appended by the closest of them, or from the
+    # connection when there are none, since clients can forge the rest.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
+}
+
+# Token requests allowed per client IP and per email, an empty value disables
+LOGIN_RATE_PER_IP = os.getenv("LOGIN_RATE_PER_IP", "60/min") or None
+LOGIN_RATE_PER_EMAIL = os.getenv("LOGIN_RATE_PER_EMAIL", "10/min") or None
+
+# Users inserted per transaction when provisioning users in bulk, and processes
+# hashing their passwords in the provision_users command
+PROVISIONING_BATCH_SIZE = int(os.getenv("PROVISIONING_BATCH_SIZE", 1000))
+PROVISIONING_WORKERS = int(os.getenv("PROVISIONING_WORKERS", os.cpu_count() or 1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -137,3 +269,38 @@ STATIC_ROOT = "vol/web/static"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.User"
+
+
+# API pagination and bulk limits
+
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 100))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 1000))
+
+API_MAX_BULK_SIZE = int(os.getenv("API_MAX_BULK_SIZE", 5000))
+
+RECIPE_SEARCH_LIMIT = int(os.getenv("RECIPE_SEARCH_LIMIT", 50))
+
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+
+# one JSON line per request with its timings, set to INFO to enable
+PERFORMANCE_LOG_LEVEL = os.getenv("PERFORMANCE_LOG_LEVEL", "WARNING")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.performance": {
+            "handlers": ["console"],
+            "level": PERFORMANCE_LOG_LEVEL,
+            "propagate": False,
+        },
+    },
+}
+
+# Bearer token Prometheus sends to scrape /metrics, which is not served
+# without one, and the functions yielding lines added to the histograms
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_COLLECTORS = ["user.authentication.token_cache_metrics"]
@@ -0,0 +1,253 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import authentication, exceptions, permissions
+
+
+ACCESS_TOKEN_SALT = "user.authentication.access"
+REFRESH_TOKEN_SALT = "user.authentication.refresh"
+
+
+def _tokens_version_key(user_id: int) -> str:
+    return f"user:tokens:{user_id}"
+
+
+def get_tokens_version(user_id: int) -> int:
+    """Return the version of a user's tokens in the cache shared by every process"""
+    key = _tokens_version_key(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        # start from the clock so a version lost to eviction never matches old entries
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump_tokens_version(user_id: int) -> None:
+    try:
+        cache.incr(_tokens_version_key(user_id))
+    except ValueError:
+        get_tokens_version(user_id)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Stop every process from authenticating a user with its cached tokens"""
+    token_cache.delete_user(user_id)
+    _bump_tokens_version(user_id)
+    # a lookup racing the transaction could have cached the old token in between
+    transaction.on_commit(lambda: _bump_tokens_version(user_id))
+
+
+class TokenCache:
+    """Tokens with their user kept in process, least recently used evicted first
+
+    Each token is cached along with the version of its user's tokens, a hit
+    is only returned while that version is still current in the shared cache.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the cached token of a key or None when missing, expired or revoked"""
+        with self._lock:
+            cached = self._tokens.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            _, token, version = cached
+            if version == get_tokens_version(token.user_id):
+                with self._lock:
+                    if key in self._tokens:
+                        self._tokens.move_to_end(key)
+                    self.hits += 1
+                return token
+
+        with self._lock:
+            if self._tokens.get(key) is cached:
+                self._tokens.pop(key, None)
+            self.misses += 1
+        return None
+
+    def contains(self, key: str) -> bool:
+        """Return whether a key has an unexpired token, without counting a lookup"""
+        with self._lock:
+            cached = self._tokens.get(key)
+            return cached is not None and cached[0] > time.monotonic()
+
+    def set(self, key: str, token) -> None:
+        """Cache a token with its user and the current version of its tokens"""
+        version = get_tokens_version(token.user_id)
+        with self._lock:
+            self._tokens[key] = (time.monotonic() + self.timeout, token, version)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove a token from the cache"""
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    def delete_user(self, user_id: int) -> None:
+        """Remove the tokens of a user from the cache"""
+        with self._lock:
+            for key, (_, token, _) in list(self._tokens.items()):
+                if token.user_id == user_id:
+                    del self._tokens[key]
+
+    def clear(self) -> None:
+        """Remove every token and reset the counters"""
+        with self._lock:
+            self._tokens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters and the number of cached tokens"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._tokens)}
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TIMEOUT)
+
+
+def token_cache_metrics():
+    """Yield the counters of the token cache of this process for /metrics"""
+    stats = token_cache.stats()
+    for name, kind, help_text, value in (
+        ("hits_total", "counter", "Tokens found in the cache.", stats["hits"]),
+        ("misses_total", "counter", "Tokens not found in the cache.", stats["misses"]),
+        ("size", "gauge", "Tokens currently cached.", stats["size"]),
+    ):
+        yield f"# HELP recipebook_token_cache_{name} {help_text}"
+        yield f"# TYPE recipebook_token_cache_{name} {kind}"
+        yield f"recipebook_token_cache_{name} {value}"
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """Token authentication looking tokens up in the database once per timeout
+
+    Deleting a token or changing its user revokes the user's cached tokens in
+    every process. Revocations are only seen by other processes through a
+    shared cache, without one tokens are looked up on every request.
+    """
+
+    def authenticate_credentials(self, key):
+        if not settings.CACHE_SHARED:
+            return super().authenticate_credentials(key)
+
+        token = token_cache.get(key)
+        if token is None:
+            # invalid tokens and inactive users raise and are never cached
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+
+        # a copy per request so changes to request.user never leak into the cache
+        return copy.copy(token.user), token
+
+
+def create_access_token(user) -> str:
+    """Return a signed access token of a user, valid for ACCESS_TOKEN_LIFETIME"""
+    return signing.dumps({"user": user.pk}, salt=ACCESS_TOKEN_SALT)
+
+
+def _auth_token_digest(token) -> str:
+    return salted_hmac(REFRESH_TOKEN_SALT, token.key).hexdigest()
+
+
+def create_refresh_token(token) -> str:
+    """Return a signed refresh token for an auth token, valid for REFRESH_TOKEN_LIFETIME
+
+    It only holds a digest of the auth token, no authentication class accepts
+    it and it stops being valid once the auth token is deleted.
+    """
+    return signing.dumps(
+        {"user": token.user_id, "token": _auth_token_digest(token)},
+        salt=REFRESH_TOKEN_SALT,
+    )
+
+
+def check_refresh_token(refresh: str):
+    """Return the auth token a refresh token was issued for
+
+    Raise AuthenticationFailed when the refresh token is invalid or expired,
+    its auth token was deleted or its user deactivated.
+    """
+    try:
+        payload = signing.loads(
+            refresh, salt=REFRESH_TOKEN_SALT, max_age=settings.REFRESH_TOKEN_LIFETIME
+        )
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed("Refresh token expired.")
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed("Invalid refresh token.")
+
+    model = authentication.TokenAuthentication().get_model()
+    token = model.objects.select_related("user").filter(user=payload["user"]).first()
+    if token is None or not constant_time_compare(
+        _auth_token_digest(token), payload["token"]
+    ):
+        raise exceptions.AuthenticationFailed("Refresh token revoked.")
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+    return token
+
+
+class AccessTokenAuthentication(authentication.BaseAuthentication):
+    """Authenticate requests with signed access tokens, reads without any query
+
+    Access tokens are verified with the secret key alone, so reads stay valid
+    until they expire even when their user is deactivated or logs out. The user
+    of a read only has its id, which is all recipe views filter on. Writes
+    load the user, they are rejected once it was deleted or deactivated.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid access token header.")
+
+        try:
+            payload = signing.loads(
+                auth[1].decode(),
+                salt=ACCESS_TOKEN_SALT,
+                max_age=settings.ACCESS_TOKEN_LIFETIME,
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed("Access token expired.")
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed("Invalid access token.")
+
+        if request.method in permissions.SAFE_METHODS:
+            return get_user_model()(pk=payload["user"]), payload
+
+        user = (
+            get_user_model().objects.filter(pk=payload["user"], is_active=True).first()
+        )
+        if user is None:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,36 @@
+import codecs
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from user.provisioning import parse_rows
+
+
+class RowsParser(parsers.BaseParser):
+    """Parse a body into a lazy iterator of (line number, row) pairs
+
+    The body is read one line at a time while the rows are consumed, so an
+    upload is never held in memory as a whole.
+    """
+
+    format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        return self._rows(codecs.iterdecode(stream, encoding))
+
+    def _rows(self, lines):
+        try:
+            yield from parse_rows(lines, self.format)
+        except UnicodeDecodeError as exc:
+            raise ParseError(f"Body is not valid text: {exc}")
+
+
+class NDJSONRowsParser(RowsParser):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRowsParser(RowsParser):
+    media_type = "text/csv"
+    format = "csv"
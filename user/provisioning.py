@@ -0,0 +1,187 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+
+from django.contrib.auth import get_user_model, hashers
+from django.db import IntegrityError, router, transaction
+from django.db.models.signals import post_save
+from rest_framework import serializers
+
+from core.hashers import HasherPoolFull, hasher_pool
+from user.serializers import UserSerializer
+
+
+FORMATS = ("csv", "ndjson")
+DUPLICATE_EMAIL = "A user with this email already exists."
+HASHERS_BUSY = "Too many passwords being hashed, try again shortly."
+
+
+class ProvisionUserSerializer(UserSerializer):
+    """User serializer leaving unique emails to be checked once per batch"""
+
+    class Meta(UserSerializer.Meta):
+        extra_kwargs = {
+            **UserSerializer.Meta.extra_kwargs,
+            "email": {"validators": []},
+        }
+
+
+def parse_rows(lines, format: str):
+    """Yield the line number and content of each row of CSV or NDJSON text
+
+    Rows that cannot be parsed are yielded as a ValidationError.
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # the header is line 1, a row ends on the last line it spans
+            if None in row:
+                yield reader.line_num, serializers.ValidationError("Too many columns.")
+            else:
+                yield reader.line_num, row
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if isinstance(row, dict):
+            yield number, row
+        else:
+            yield number, serializers.ValidationError("Expected a JSON object.")
+
+
+class Provisioner:
+    """Create users from rows in batches
+
+    Passwords are hashed in a pool of `workers` processes, or without workers
+    in the hasher pool shared with logins, a batch at most as many at a time
+    as the pool has threads.
+
+    Invalid rows, rows whose email is taken and rows of a batch the hasher
+    pool had no room for are reported by line number instead of failing the
+    whole upload.
+    """
+
+    def __init__(self, batch_size: int, workers: int = 0):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.created = 0
+        self.errors = []
+        self._lines_by_email = {}
+        self._pool = None
+
+    def run(self, rows) -> dict:
+        """Provision users from (line number, row) pairs and return a report"""
+        rows = iter(rows)
+        with ExitStack() as stack:
+            if self.workers:
+                self._pool = stack.enter_context(ProcessPoolExecutor(self.workers))
+
+            batch = list(islice(rows, self.batch_size))
+            while batch:
+                self._provision(batch)
+                batch = list(islice(rows, self.batch_size))
+
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+    def _hash_passwords(self, passwords):
+        if self._pool is None:
+            return hasher_pool.map(hashers.make_password, passwords)
+
+        return self._pool.map(
+            hashers.make_password,
+            passwords,
+            chunksize=max(1, len(passwords) // (self.workers * 4)),
+        )
+
+    def _fail(self, number: int, row, detail) -> None:
+        email = row.get("email") if isinstance(row, dict) else None
+        if not isinstance(detail, dict):
+            detail = {"non_field_errors": detail}
+        self.errors.append({"line": number, "email": email, "errors": detail})
+
+    def _provision(self, batch):
+        serializer = ProvisionUserSerializer()
+        valid = []
+        for number, row in batch:
+            try:
+                if isinstance(row, serializers.ValidationError):
+                    raise row
+                attrs = serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                self._fail(number, row, exc.detail)
+                continue
+
+            first = self._lines_by_email.setdefault(attrs["email"], number)
+            if first != number:
+                self._fail(number, attrs, {"email": [f"Duplicate of line {first}."]})
+            else:
+                valid.append((number, attrs))
+
+        taken = set(
+            get_user_model()
+            .objects.filter_email(*(attrs["email"] for _, attrs in valid))
+            .values_list("email", flat=True)
+        )
+        for number, attrs in valid:
+            if attrs["email"] in taken:
+                self._fail(number, attrs, {"email": [DUPLICATE_EMAIL]})
+        valid = [
+            (number, attrs) for number, attrs in valid if attrs["email"] not in taken
+        ]
+
+        try:
+            hashes = self._hash_passwords([attrs.pop("password") for _, attrs in valid])
+        except HasherPoolFull:
+            for number, attrs in valid:
+                self._fail(number, attrs, [HASHERS_BUSY])
+            return
+
+        users = [
+            get_user_model()(password=encoded, **attrs)
+            for (_, attrs), encoded in zip(valid, hashes)
+        ]
+        self._insert([number for number, _ in valid], users)
+
+    def _insert(self, numbers, users):
+        """Insert users at once, or one by one when an email was taken meanwhile"""
+        model = get_user_model()
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(users)
+        except IntegrityError:
+            for number, user in zip(numbers, users):
+                try:
+                    with transaction.atomic():
+                        user.save(force_insert=True)
+                except IntegrityError:
+                    self._fail(
+                        number, {"email": user.email}, {"email": [DUPLICATE_EMAIL]}
+                    )
+                else:
+                    self.created += 1
+            return
+
+        self.created += len(users)
+        # bulk inserts skip the signals preparing new users, like their caches
+        using = router.db_for_write(model)
+        for user in users:
+            if user.pk is not None:
+                post_save.send(
+                    sender=model,
+                    instance=user,
+                    created=True,
+                    update_fields=None,
+                    raw=False,
+                    using=using,
+                )
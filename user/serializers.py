@@ -1,12 +1,27 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.db import models
 from django.utils.translation import ugettext_lazy as t
 
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+
+from user.authentication import check_refresh_token
+
+
+class LowercaseEmailField(serializers.EmailField):
+    """Email field lowercasing its value before validators check it is unique"""
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(data).lower()
 
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the User object"""
 
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.EmailField: LowercaseEmailField,
+    }
+
     class Meta:
         model = get_user_model()
         fields = (
@@ -32,7 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
 
         if password:
             user.set_password(password)
-            user.save
+            user.save()
 
         return user
 
@@ -61,3 +76,18 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer exchanging a refresh token for a new access token"""
+
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the refresh token without checking the password again"""
+        try:
+            attrs["token"] = check_refresh_token(attrs["refresh"])
+        except exceptions.AuthenticationFailed as exc:
+            raise serializers.ValidationError(exc.detail, code="authentication")
+
+        return attrs
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import revoke_user_tokens
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, created=False, **kwargs):
+    """Stop authenticating with a cached token once it changed or was deleted"""
+    if not created:
+        revoke_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def evict_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens of a changed user so a deactivation applies right away"""
+    if not created:
+        revoke_user_tokens(instance.pk)
@@ -0,0 +1,271 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.tests.utils import APIClient
+from user.authentication import (
+    TokenCache,
+    _bump_tokens_version,
+    create_access_token,
+    create_refresh_token,
+    token_cache,
+)
+
+ME_URL = reverse("user:me")
+RECIPES_URL = reverse("recipe:recipe-list")
+TOKEN_URL = reverse("user:token")
+REFRESH_URL = reverse("user:token-refresh")
+
+
+class TokenCacheTest(SimpleTestCase):
+    """Test the in-process token cache"""
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used token is evicted once full"""
+        cache = TokenCache(max_size=2, timeout=60)
+        cache.set("a", Token(key="a", user_id=1))
+        cache.set("b", Token(key="b", user_id=2))
+        cache.get("a")
+        cache.set("c", Token(key="c", user_id=3))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 2})
+
+    def test_expired_token_missed(self):
+        """Test tokens are looked up again after the timeout"""
+        cache = TokenCache(max_size=2, timeout=0)
+        cache.set("a", Token(key="a", user_id=1))
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_revoked_token_missed(self):
+        """Test tokens are missed once their user's tokens were revoked elsewhere"""
+        cache = TokenCache(max_size=2, timeout=60)
+        cache.set("a", Token(key="a", user_id=1))
+        cache.set("b", Token(key="b", user_id=2))
+
+        # another process revoking tokens only bumps the shared version
+        _bump_tokens_version(1)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+
+
+@override_settings(CACHE_SHARED=True)
+class CachedTokenAuthenticationTest(TestCase):
+    """Test authenticating requests with cached tokens"""
+
+    def setUp(self) -> None:
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "pass1!", name="Test"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_looked_up_once(self):
+        """Test repeated requests authenticate without querying the database"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], self.user.email)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating right away"""
+        self.client.get(RECIPES_URL)
+
+        self.token.delete()
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test the token of a deactivated user stops authenticating right away"""
+        self.client.get(RECIPES_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_not_cached(self):
+        """Test invalid tokens are rejected and not cached"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_user_changes_not_cached(self):
+        """Test updating the user is reflected in later requests"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"name": "Renamed"})
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.data["name"], "Renamed")
+
+    @override_settings(CACHE_SHARED=False)
+    def test_tokens_not_cached_without_shared_cache(self):
+        """Test tokens are looked up on every request with a local cache"""
+        self.client.get(ME_URL)
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+
+class AccessTokenAuthenticationTest(TestCase):
+    """Test authenticating requests with signed access tokens"""
+
+    def setUp(self) -> None:
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "pass1!")
+        self.client = APIClient()
+
+    def test_login_issues_access_and_refresh_tokens(self):
+        """Test logging in returns an access token along with the auth token"""
+        response = self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": "pass1!"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = Token.objects.get(user=self.user)
+        self.assertEqual(response.data["token"], token.key)
+        self.assertNotIn(token.key, response.data["refresh"])
+        self._assert_authenticates(response.data["access"])
+
+    def test_refresh_issues_access_token(self):
+        """Test a refresh token is exchanged for an access token"""
+        token = Token.objects.create(user=self.user)
+
+        response = self.client.post(
+            REFRESH_URL, {"refresh": create_refresh_token(token)}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], token.key)
+        self._assert_authenticates(response.data["access"])
+
+    def test_refresh_token_not_accepted_by_api(self):
+        """Test a refresh token cannot authenticate API requests"""
+        refresh = create_refresh_token(Token.objects.create(user=self.user))
+
+        for keyword in ("Token", "Bearer"):
+            self.client.credentials(HTTP_AUTHORIZATION=f"{keyword} {refresh}")
+            response = self.client.get(RECIPES_URL)
+
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_auth_token_not_accepted_as_refresh_token(self):
+        """Test the long lived auth token cannot be exchanged for access tokens"""
+        token = Token.objects.create(user=self.user)
+
+        response = self.client.post(REFRESH_URL, {"refresh": token.key})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_token_revoked_with_auth_token(self):
+        """Test a refresh token stops working once its auth token is deleted"""
+        token = Token.objects.create(user=self.user)
+        refresh = create_refresh_token(token)
+        token.delete()
+        Token.objects.create(user=self.user)
+
+        response = self.client.post(REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("access", response.data)
+
+    @override_settings(LOGIN_RATE_PER_IP="1/min")
+    def test_refresh_throttled_per_ip(self):
+        """Test refresh requests from a client IP are limited"""
+        cache.clear()
+        self.client.post(REFRESH_URL, {"refresh": "invalid"})
+
+        response = self.client.post(REFRESH_URL, {"refresh": "invalid"})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_invalid_refresh_token_rejected(self):
+        """Test an unknown refresh token is rejected"""
+        response = self.client.post(REFRESH_URL, {"refresh": "invalid"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("access", response.data)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_access_token_authenticates_without_queries(self):
+        """Test a cached list is served to an access token without any query"""
+        self._authenticate(create_access_token(self.user))
+        self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tampered_access_token_rejected(self):
+        """Test an access token with another user id is rejected"""
+        access = create_access_token(self.user)
+        tampered = access.replace(access.split(":")[0], "eyJ1c2VyIjoyfQ")
+        self._authenticate(tampered)
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=-1)
+    def test_expired_access_token_rejected(self):
+        """Test an access token is rejected past its lifetime"""
+        self._authenticate(create_access_token(self.user))
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_access_token_of_deleted_user_cannot_write(self):
+        """Test writes with the access token of a deleted user are rejected"""
+        self._authenticate(create_access_token(self.user))
+        self.user.delete()
+
+        response = self.client.post(
+            RECIPES_URL, {"title": "Pancakes", "time_minutes": 10, "price": "5.00"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_access_token_writes_as_loaded_user(self):
+        """Test writes authenticate the stored user"""
+        self._authenticate(create_access_token(self.user))
+
+        response = self.client.post(
+            RECIPES_URL, {"title": "Pancakes", "time_minutes": 10, "price": "5.00"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    # Helpers
+    def _authenticate(self, access: str):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def _assert_authenticates(self, access: str):
+        self._authenticate(access)
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,185 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from django.contrib.auth.hashers import make_password
+
+from core.hashers import HasherPoolFull, hasher_pool
+from core.tests.utils import APIClient
+from user.provisioning import DUPLICATE_EMAIL, HASHERS_BUSY, Provisioner, parse_rows
+
+PROVISION_URL = reverse("user:provision")
+
+
+def ndjson(*rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+class ParseRowsTest(TestCase):
+    def test_parse_csv_rows(self):
+        """Test csv rows are numbered by line, quoted newlines included"""
+        lines = 'email,name,password\na@test.com,"Ann\nLee",pass1!\nb@test.com,Bob\n'
+
+        rows = list(parse_rows(lines.splitlines(keepends=True), "csv"))
+
+        self.assertEqual(
+            rows[0],
+            (3, {"email": "a@test.com", "name": "Ann\nLee", "password": "pass1!"}),
+        )
+        self.assertEqual(
+            rows[1], (4, {"email": "b@test.com", "name": "Bob", "password": None})
+        )
+
+    def test_parse_ndjson_rows(self):
+        """Test blank lines are skipped and malformed lines reported"""
+        lines = ['{"email": "a@test.com"}\n', "\n", "[1]\n", "{oops\n"]
+
+        rows = list(parse_rows(lines, "ndjson"))
+
+        self.assertEqual(rows[0], (1, {"email": "a@test.com"}))
+        self.assertEqual([number for number, _ in rows], [1, 3, 4])
+        self.assertIsInstance(rows[2][1], Exception)
+
+
+@override_settings(PROVISIONING_BATCH_SIZE=2)
+class ProvisionUsersApiTest(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "pass1!"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_provision_ndjson(self):
+        """Test provisioning users from NDJSON with hashed passwords"""
+        body = ndjson(
+            {"email": "One@Test.com", "name": "One", "password": "secret1"},
+            {"email": "two@test.com", "name": "Two", "password": "secret2"},
+            {"email": "three@test.com", "name": "Three", "password": "secret3"},
+        )
+
+        response = self._provision(body, "application/x-ndjson")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 3, "failed": 0, "errors": []})
+        user = get_user_model().objects.get(email="one@test.com")
+        self.assertEqual(user.name, "One")
+        self.assertTrue(user.check_password("secret1"))
+        self.assertFalse(user.is_staff)
+
+    def test_provision_csv(self):
+        """Test provisioning users from CSV"""
+        body = (
+            "email,name,password\nann@test.com,Ann,secret1\nbob@test.com,Bob,secret2\n"
+        )
+
+        response = self._provision(body, "text/csv")
+
+        self.assertEqual(response.data["created"], 2)
+        self.assertTrue(
+            get_user_model().objects.get(email="bob@test.com").check_password("secret2")
+        )
+
+    def test_provision_reports_failed_rows(self):
+        """Test invalid rows and duplicate emails are reported by line"""
+        get_user_model().objects.create_user("taken@test.com", "pass1!")
+        body = (
+            ndjson(
+                {"email": "ok@test.com", "name": "Ok", "password": "secret1"},
+                {"email": "TAKEN@test.com", "name": "Taken", "password": "secret1"},
+                {"email": "OK@test.com", "name": "Again", "password": "secret1"},
+                {"email": "short@test.com", "name": "Short", "password": "abc"},
+            )
+            + "not json\n"
+        )
+
+        response = self._provision(body, "application/x-ndjson")
+
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["failed"], 4)
+        errors = response.data["errors"]
+        self.assertEqual([error["line"] for error in errors], [2, 3, 4, 5])
+        self.assertEqual(errors[0]["errors"], {"email": [DUPLICATE_EMAIL]})
+        self.assertEqual(errors[1]["errors"], {"email": ["Duplicate of line 1."]})
+        self.assertIn("password", errors[2]["errors"])
+        self.assertIn("non_field_errors", errors[3]["errors"])
+        self.assertEqual(get_user_model().objects.filter(name="Again").count(), 0)
+
+    def test_provision_hashes_in_hasher_pool(self):
+        """Test uploads hash passwords in the hasher pool instead of processes"""
+        body = ndjson({"email": "one@test.com", "name": "One", "password": "secret1"})
+
+        with patch("user.provisioning.ProcessPoolExecutor") as pool, patch.object(
+            hasher_pool, "map", wraps=hasher_pool.map
+        ) as hash_passwords:
+            response = self._provision(body, "application/x-ndjson")
+
+        self.assertEqual(response.data["created"], 1)
+        pool.assert_not_called()
+        hash_passwords.assert_called_once_with(make_password, ["secret1"])
+
+    def test_provision_full_hasher_pool(self):
+        """Test rows of a batch the hasher pool had no room for are reported"""
+        body = ndjson(
+            {"email": "one@test.com", "name": "One", "password": "secret1"},
+            {"email": "two@test.com", "name": "Two", "password": "secret2"},
+            {"email": "three@test.com", "name": "Three", "password": "secret3"},
+        )
+
+        with patch.object(
+            hasher_pool, "map", side_effect=[HasherPoolFull(), ["hash3"]]
+        ):
+            response = self._provision(body, "application/x-ndjson")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [1, 2])
+        self.assertEqual(
+            response.data["errors"][0]["errors"], {"non_field_errors": [HASHERS_BUSY]}
+        )
+        self.assertTrue(get_user_model().objects.filter(name="Three").exists())
+
+    def test_provision_unsupported_media_type(self):
+        """Test uploads other than CSV or NDJSON are rejected"""
+        response = self.client.post(
+            PROVISION_URL, {"email": "a@test.com"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_provision_requires_admin(self):
+        """Test users that are not staff cannot provision users"""
+        user = get_user_model().objects.create_user("user@test.com", "pass1!")
+        self.client.force_authenticate(user=user)
+
+        response = self._provision(
+            ndjson({"email": "a@test.com"}), "application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(get_user_model().objects.filter(email="a@test.com").exists())
+
+    # Helpers
+    def _provision(self, body, content_type):
+        return self.client.generic(
+            "POST", PROVISION_URL, body.encode(), content_type=content_type
+        )
+
+
+class ProvisionerTest(TestCase):
+    def test_insert_falls_back_to_single_rows(self):
+        """Test a batch with an email taken after it was checked keeps its other rows"""
+        provisioner = Provisioner(batch_size=10, workers=1)
+        model = get_user_model()
+        model.objects.create_user("late@test.com", "pass1!")
+        users = [model(email="late@test.com", name="Late"), model(email="new@test.com")]
+
+        provisioner._insert([1, 2], users)
+
+        self.assertEqual(provisioner.created, 1)
+        self.assertEqual(provisioner.errors[0]["line"], 1)
+        self.assertTrue(model.objects.filter(email="new@test.com").exists())
@@ -1,12 +1,16 @@
+from unittest.mock import patch
+
 from django import db
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 import rest_framework
 
-from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.hashers import HasherPoolFull, hasher_pool
+from core.tests.utils import APIClient
 
 CREATE_USER_URL = reverse("user:create")
 CREATE_TOKEN_URL = reverse("user:token")
@@ -47,6 +51,16 @@ class PublicUserApiTest(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_user_already_exist_in_other_case_return_bad_request(self):
+        """Test creating a user whose email only differs by case is rejected"""
+        create_user(email="test@test.com", password="testpass")
+        payload = {"email": "Test@TEST.com", "name": "Test", "password": "testpass"}
+
+        response = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data)
+
     def test_password_too_short_returns_bad_request(self):
         """Test creating a user with a password too short returns a bad request"""
         payload = {"email": "test@test.com", "password": "pw"}
@@ -70,6 +84,16 @@ class PublicUserApiTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("token", response.data)
 
+    def test_create_token_ignores_email_case(self):
+        """Test a token is created for an email typed in another case"""
+        create_user(email="token@testtest.email", password="testpass123")
+        payload = {"email": "Token@TestTest.email", "password": "testpass123"}
+
+        response = self.client.post(CREATE_TOKEN_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("token", response.data)
+
     def test_create_token_with_invalid_credential_fails(self):
         """Test that creating a token with invalid login creds fails"""
         create_user(email="derp@blerp.com", password="flerp123")
@@ -104,6 +128,65 @@ class PublicUserApiTest(TestCase):
 
         self._assert_token_creation_failed(response)
 
+    @override_settings(LOGIN_RATE_PER_EMAIL="2/min")
+    def test_create_token_throttled_per_email(self):
+        """Test token requests for an email are limited across client IPs"""
+        cache.clear()
+        payload = {"email": "derp@blerp.com", "password": "testwrongpass"}
+
+        for ip in ("10.0.0.1", "10.0.0.2"):
+            response = self.client.post(CREATE_TOKEN_URL, payload, REMOTE_ADDR=ip)
+            self._assert_token_creation_failed(response)
+        response = self.client.post(
+            CREATE_TOKEN_URL, {**payload, "email": "DERP@blerp.com"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(LOGIN_RATE_PER_IP="2/min")
+    def test_create_token_throttled_per_ip(self):
+        """Test token requests from a client IP are limited across emails"""
+        cache.clear()
+        for i in range(2):
+            payload = {"email": f"user{i}@blerp.com", "password": "testpass"}
+            response = self.client.post(CREATE_TOKEN_URL, payload)
+            self._assert_token_creation_failed(response)
+
+        payload = {"email": "other@blerp.com", "password": "testpass"}
+        response = self.client.post(CREATE_TOKEN_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post(CREATE_TOKEN_URL, payload, REMOTE_ADDR="10.0.0.3")
+        self._assert_token_creation_failed(response)
+
+    @override_settings(LOGIN_RATE_PER_IP="2/min")
+    def test_create_token_throttle_ignores_forwarded_for(self):
+        """Test a client cannot escape the IP limit with forged forwarded IPs"""
+        cache.clear()
+        payload = {"email": "user@blerp.com", "password": "testpass"}
+        for i in range(2):
+            response = self.client.post(
+                CREATE_TOKEN_URL, payload, HTTP_X_FORWARDED_FOR=f"10.0.1.{i}"
+            )
+            self._assert_token_creation_failed(response)
+
+        response = self.client.post(
+            CREATE_TOKEN_URL, payload, HTTP_X_FORWARDED_FOR="10.0.1.9"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_create_token_hasher_pool_full(self):
+        """Test logins are asked to retry while the hasher pool is full"""
+        create_user(email="test@test.com", password="testpass")
+        payload = {"email": "test@test.com", "password": "testpass"}
+
+        with patch.object(hasher_pool, "submit", side_effect=HasherPoolFull("Busy.")):
+            response = self.client.post(CREATE_TOKEN_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
     def test_authentication_is_required_on_me_endpoint(self):
         """Test that authentication is required to access /me endpoint"""
         response = self.client.get(ME_URL)
@@ -156,3 +239,11 @@ class PrivateUserApiTests(TestCase):
 
         self.user.refresh_from_db()
         self.assertEqual(self.user.name, new_name)
+
+    def test_update_user_password(self):
+        """Test a user can change its password through the /me endpoint"""
+        response = self.client.patch(ME_URL, {"password": "newpass123"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("newpass123"))
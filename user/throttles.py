@@ -0,0 +1,37 @@
+import hashlib
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPRateThrottle(SimpleRateThrottle):
+    """Limit the token requests of a client IP"""
+
+    scope = "login_ip"
+
+    def get_rate(self):
+        return settings.LOGIN_RATE_PER_IP
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    """Limit the token requests for an email, whichever IPs they come from"""
+
+    scope = "login_email"
+
+    def get_rate(self):
+        return settings.LOGIN_RATE_PER_EMAIL
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email:
+            return None
+
+        # cache keys cannot hold every character an email can
+        ident = hashlib.sha256(str(email).strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
@@ -1,7 +1,23 @@
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from rest_framework import generics, permissions
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
-from user.serializers import AuthTokenSerializer, UserSerializer
+from rest_framework.views import APIView
+from user.authentication import (
+    CachedTokenAuthentication,
+    create_access_token,
+    create_refresh_token,
+)
+from user.serializers import (
+    AuthTokenSerializer,
+    RefreshTokenSerializer,
+    UserSerializer,
+)
+from user.parsers import CSVRowsParser, NDJSONRowsParser
+from user.provisioning import Provisioner
+from user.throttles import LoginEmailRateThrottle, LoginIPRateThrottle
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -14,7 +30,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage an authenticated user"""
 
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
@@ -22,8 +38,56 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+def token_response(token) -> Response:
+    """Return the auth token of a user with new refresh and access tokens"""
+    return Response(
+        {
+            "token": token.key,
+            "refresh": create_refresh_token(token),
+            "access": create_access_token(token.user),
+            "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+        }
+    )
+
+
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user"""
+    """Create a new auth token for user, along with a short lived access token"""
 
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (LoginIPRateThrottle, LoginEmailRateThrottle)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token, created = Token.objects.get_or_create(
+            user=serializer.validated_data["user"]
+        )
+        return token_response(token)
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Exchange a refresh token for a new access token, without the password"""
+
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = (LoginIPRateThrottle,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return token_response(serializer.validated_data["token"])
+
+
+class ProvisionUsersView(APIView):
+    """Create users in bulk from a CSV or NDJSON upload, for admins only"""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+    parser_classes = (NDJSONRowsParser, CSVRowsParser)
+
+    def post(self, request, *args, **kwargs):
+        # passwords are hashed in the hasher pool, forking workers is for the command
+        provisioner = Provisioner(settings.PROVISIONING_BATCH_SIZE)
+        return Response(provisioner.run(request.data))